@@ -44,13 +44,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "stats.metrics.RequestMetricsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "stats.profiling.ProfilingMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    "stats.db.PublicReadsMiddleware",
 ]
 
 ROOT_URLCONF = 'pescara_site.urls'
@@ -66,11 +69,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                 "stats.context_processors.pescara_team",
-                "stats.context_processors.site_settings",
-                
-
-
+                "stats.context_processors.site_context",
             ],
         },
     },
@@ -89,6 +88,45 @@ DATABASES = {
     }
 }
 
+# Production profile: keep connections open between requests and serve the
+# public pages from a read-only connection to the same file (stats/db.py), so
+# admin writes never hold up visitors. SQLite pragmas (WAL, synchronous,
+# mmap, cache) are applied to every connection in both profiles.
+DB_PROFILE = os.getenv("DJANGO_DB_PROFILE", "dev")
+if DB_PROFILE == "production":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": int(os.getenv("DJANGO_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+    })
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["stats.db.ReadWriteRouter"]
+
+
+# Cache
+# Per-process memory by default; point DJANGO_CACHE_BACKEND/LOCATION at a shared
+# backend (e.g. django.core.cache.backends.filebased.FileBasedCache and a
+# directory) so every worker process sees the same cached data.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "pescara-site"),
+    }
+}
+
+# Prometheus scrapers authenticate to /metricas/ with this bearer token
+# (staff users can always read it).
+STATS_METRICS_TOKEN = os.getenv("STATS_METRICS_TOKEN", "")
+
+# Reports written by ?_profile=1 (staff only), listed in the admin.
+STATS_PROFILE_DIR = Path(os.getenv("STATS_PROFILE_DIR", BASE_DIR / "profiles"))
+
+# Storage of the tables created with "Crear siguiente tabla desde la última":
+# "full" copies every entry, "delta" stores only the teams you change
+# (stats/snapshots.py).
+STATS_TABLE_STORAGE = os.getenv("STATS_TABLE_STORAGE", "full")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -128,6 +166,23 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "stats" / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Outside DEBUG, collectstatic writes content-hashed names (plus a manifest),
+# minified CSS and .gz/.br siblings (stats/storage.py). Serve STATIC_URL with
+# "Cache-Control: public, max-age=31536000, immutable" and, where the server
+# supports it, the precompressed files.
+STATIC_MANIFEST = os.getenv("DJANGO_STATIC_MANIFEST", "0" if DEBUG else "1") == "1"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "stats.storage.PrecompressedManifestStaticFilesStorage" if STATIC_MANIFEST
+        else "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Montserrat is served from STATIC_URL once `manage.py subset_fonts` has
+# written its woff2 subsets; until then base.html loads it from Google Fonts.
+STATS_SELF_HOSTED_FONTS = (BASE_DIR / "stats" / "static" / "stats" / "fonts" / "montserrat-latin-400.woff2").exists()
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
@@ -1,12 +1,22 @@
 from django.contrib import admin, messages
+from django.db import transaction
+from django.http import FileResponse, Http404
 from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.urls import path, reverse
 from django.utils import timezone
 
+from .signals import batched_changes
+from .site import invalidate_site_info
+from .snapshots import FULL, clone_entries, storage_mode
+from .standings import refresh_standings
+from .versioning import bump_data_version
 from .models import (
     Team, Player, PescaraGame, Appearance,
-    LeagueTable, LeagueTableEntry, SiteSettings
+    LeagueTable, LeagueTableEntry, SiteSettings, PlayerStats, DataVersion
 )
+from .page_cache import page_cache_stats, reset_page_cache_stats
+from . import metrics, profiling
 
 
 
@@ -27,6 +37,18 @@ class PlayerAdmin(admin.ModelAdmin):
     search_fields = ("first_name", "last_name")
 
 
+@admin.register(PlayerStats)
+class PlayerStatsAdmin(admin.ModelAdmin):
+    list_display  = ("player", "games_played", "goals", "goals_per_match",
+                     "scoring_streak", "best_scoring_streak", "last_appearance")
+    search_fields = ("player__first_name", "player__last_name")
+    readonly_fields = [f.name for f in PlayerStats._meta.fields]
+
+    # rows are maintained by stats/signals.py and `manage.py rebuild_player_stats`
+    def has_add_permission(self, request):
+        return False
+
+
 class AppearanceInline(admin.TabularInline):
     model = Appearance
     extra = 0
@@ -51,7 +73,7 @@ class LeagueTableEntryInline(admin.TabularInline):
 
 @admin.register(LeagueTable)
 class LeagueTableAdmin(admin.ModelAdmin):
-    list_display       = ("jornada", "date")
+    list_display       = ("jornada", "date", "storage")
     inlines            = [LeagueTableEntryInline]
     date_hierarchy     = "date"
     ordering           = ("-date", "-jornada")
@@ -60,6 +82,12 @@ class LeagueTableAdmin(admin.ModelAdmin):
     # custom button on the changelist
     change_list_template = "admin/stats/leaguetable/change_list.html"
 
+    def changeform_view(self, request, *args, **kwargs):
+        # the table and each inline row would refresh the standings (and bump
+        # the version) one by one; do it once for the whole form
+        with transaction.atomic(), batched_changes():
+            return super().changeform_view(request, *args, **kwargs)
+
     # custom URL for cloning latest table
     def get_urls(self):
         urls = super().get_urls()
@@ -75,7 +103,9 @@ class LeagueTableAdmin(admin.ModelAdmin):
     def create_from_latest(self, request):
         """
         Create a new LeagueTable (jornada = latest + 1, date = today)
-        and clone all its entries so you only edit the changes.
+        and clone all its entries so you only edit the changes. With
+        STATS_TABLE_STORAGE = "delta" the new table starts empty instead:
+        teams you don't add carry over from the previous table.
         """
         latest = LeagueTable.objects.order_by("-date", "-jornada").first()
         if not latest:
@@ -93,32 +123,25 @@ class LeagueTableAdmin(admin.ModelAdmin):
             return redirect(reverse("admin:stats_leaguetable_change", args=[existing.pk]))
 
         # Create new table
+        storage = storage_mode()
         new_table = LeagueTable.objects.create(
             jornada=next_jornada,
             date=timezone.now().date(),
+            storage=storage,
         )
 
-        # Clone entries — only fields that exist on your model
-        to_create = []
-        for e in latest.entries.all():
-            to_create.append(
-                LeagueTableEntry(
-                    table=new_table,
-                    team=e.team,
-                    position=getattr(e, "position", 0),
-                    played=getattr(e, "played", 0),
-                    wins=getattr(e, "wins", 0),
-                    draws=getattr(e, "draws", 0),
-                    losses=getattr(e, "losses", 0),
-                    points=getattr(e, "points", 0),
-                )
-            )
-        LeagueTableEntry.objects.bulk_create(to_create)
+        # Clone every field of every entry (one INSERT ... SELECT)
+        if storage == FULL:
+            clone_entries(latest, new_table)
+            # the raw insert sends no signals
+            refresh_standings([new_table.pk])
+            bump_data_version()
 
         messages.success(
             request,
             f"Tabla J{new_table.jornada} creada a partir de J{latest.jornada}. "
-            "¡Edita y guarda los cambios!"
+            + ("¡Edita y guarda los cambios!" if storage == FULL
+               else "Agrega solo los equipos que cambiaron.")
         )
         return redirect(reverse("admin:stats_leaguetable_change", args=[new_table.pk]))
     
@@ -138,5 +161,92 @@ class SiteSettingsAdmin(admin.ModelAdmin):
         obj.is_active = True
         obj.full_clean()
         obj.save()
+        invalidate_site_info()  # the bulk update() above sends no signals
         self.message_user(request, f"'{obj}' is now the only active SiteSettings.")
-    make_active.short_description = "Set selected as the active SiteSettings (only one)"
\ No newline at end of file
+    make_active.short_description = "Set selected as the active SiteSettings (only one)"
+
+
+# -----------------------
+# Data version / page cache
+# -----------------------
+
+@admin.register(DataVersion)
+class DataVersionAdmin(admin.ModelAdmin):
+    list_display = ("version", "updated_at")
+    readonly_fields = ("version", "updated_at")
+
+    # page cache hit/miss counters under the changelist
+    change_list_template = "admin/stats/dataversion/change_list.html"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        my = [
+            path(
+                "reset-cache-stats/",
+                self.admin_site.admin_view(self.reset_cache_stats),
+                name="stats_dataversion_reset_cache_stats",
+            ),
+            path(
+                "metrics/",
+                self.admin_site.admin_view(self.metrics_view),
+                name="stats_dataversion_metrics",
+            ),
+            path(
+                "profiles/",
+                self.admin_site.admin_view(self.profiles_view),
+                name="stats_dataversion_profiles",
+            ),
+            path(
+                "profiles/<str:name>",
+                self.admin_site.admin_view(self.profile_download),
+                name="stats_dataversion_profile_download",
+            ),
+        ]
+        return my + urls
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), "cache_stats": page_cache_stats()}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def metrics_view(self, request):
+        """Per-view latency/queries recorded by RequestMetricsMiddleware (this process)."""
+        if request.method == "POST":
+            metrics.reset()
+            messages.success(request, "Métricas reiniciadas.")
+            return redirect("admin:stats_dataversion_metrics")
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Métricas por vista",
+            "opts": self.model._meta,
+            "rows": metrics.snapshot(),
+        }
+        return TemplateResponse(request, "admin/stats/dataversion/metrics.html", context)
+
+    def profiles_view(self, request):
+        """Reports saved by ?_profile=1 (stats/profiling.py)."""
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Perfiles de peticiones",
+            "opts": self.model._meta,
+            "profiles": profiling.list_profiles(),
+            "profile_param": profiling.PROFILE_PARAM,
+        }
+        return TemplateResponse(request, "admin/stats/dataversion/profiles.html", context)
+
+    def profile_download(self, request, name):
+        path = profiling.profile_path(name)
+        if not path:
+            raise Http404("Perfil no encontrado")
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
+
+    def reset_cache_stats(self, request):
+        if request.method == "POST":
+            reset_page_cache_stats()
+            messages.success(request, "Contadores de caché reiniciados.")
+        return redirect("admin:stats_dataversion_changelist")
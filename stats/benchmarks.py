@@ -0,0 +1,130 @@
+"""
+Per-view benchmarks over synthetic data (see stats/synthetic.py).
+
+run_view_benchmarks() drives every URL in stats/urls.py, plus a few
+historical standings lookups and searches, through the test client and
+records wall time, query count and peak memory; compare() checks a run
+against a saved JSON baseline. `manage.py benchmark_views` wires both up
+against a throwaway test database.
+"""
+import gc
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import LeagueTable, PescaraGame, Player
+from .versioning import get_data_version
+
+NOT_BENCHMARKED = {"metrics", "export"}  # staff-only instrumentation; streamed downloads
+
+
+def _history_cases():
+    """
+    Extra (label, url) pairs for historical standings: the oldest table, one
+    in the middle of the history (exact date+jornada, as the pager links) and
+    a lookup by date alone.
+    """
+    tables = list(LeagueTable.objects.order_by("date", "jornada").values_list("date", "jornada"))
+    if not tables:
+        return []
+    url = reverse("standings")
+    (first_day, first_j), (mid_day, mid_j) = tables[0], tables[len(tables) // 2]
+    return [
+        ("standings@first", f"{url}?date={first_day:%Y-%m-%d}&jornada={first_j}"),
+        ("standings@middle", f"{url}?date={mid_day:%Y-%m-%d}&jornada={mid_j}"),
+        ("standings@date", f"{url}?date={mid_day:%Y-%m-%d}"),
+    ]
+
+
+def _search_cases():
+    """Type-ahead and player search with a short prefix (the widest match)."""
+    return [
+        ("search@prefix", f"{reverse('search')}?q=ma"),
+        ("players@q", f"{reverse('players')}?q=gar"),
+    ]
+
+
+def _url_kwargs(pattern):
+    converters = pattern.pattern.converters
+    if "version" in converters:
+        return {"version": get_data_version()[0]}
+    if "pk" in converters:
+        model = PescaraGame if pattern.name.startswith("match") else Player
+        return {"pk": model.objects.order_by("pk").values_list("pk", flat=True).first()}
+    return {}
+
+
+def _measure(client, url):
+    gc.collect()
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return response, elapsed * 1000, len(ctx.captured_queries), peak / 1024
+
+
+def run_view_benchmarks(repeat=5):
+    """
+    {url_name: {"status", "cold_ms", "warm_ms", "queries", "peak_kb"}} for the
+    current database. "cold" is the median over `repeat` requests with an empty
+    cache (what a data change costs); "warm" repeats the request with the
+    caches filled. Queries and peak memory are taken from a cold request.
+    """
+    import stats.urls
+
+    client = Client()
+    results = {}
+    cases = [
+        (pattern.name, reverse(pattern.name, kwargs=_url_kwargs(pattern)))
+        for pattern in stats.urls.urlpatterns
+        if pattern.name not in NOT_BENCHMARKED
+    ]
+    for name, url in cases + _history_cases() + _search_cases():
+        cold, warm = [], []
+        for _ in range(repeat):
+            cache.clear()
+            response, ms, queries, peak_kb = _measure(client, url)
+            cold.append(ms)
+        for _ in range(repeat):
+            warm.append(_measure(client, url)[1])
+        results[name] = {
+            "status": response.status_code,
+            "cold_ms": round(statistics.median(cold), 2),
+            "warm_ms": round(statistics.median(warm), 2),
+            "queries": queries,
+            "peak_kb": round(peak_kb, 1),
+        }
+    return results
+
+
+def compare(results, baseline, threshold=0.5, noise_ms=5.0):
+    """
+    Return a list of regressions of `results` against `baseline` (both
+    {size: {url_name: metrics}}). A view regresses when it issues more
+    queries, or when its cold time or peak memory grows by more than
+    `threshold` (0.5 = +50%); times within `noise_ms` are ignored.
+    """
+    problems = []
+    for size, views in results.items():
+        for name, now in views.items():
+            before = baseline.get(size, {}).get(name)
+            if not before:
+                continue
+            where = f"{name} @ {size}"
+            if now["queries"] > before["queries"]:
+                problems.append(f"{where}: queries {before['queries']} → {now['queries']}")
+            if (now["cold_ms"] > before["cold_ms"] * (1 + threshold)
+                    and now["cold_ms"] - before["cold_ms"] > noise_ms):
+                problems.append(f"{where}: cold {before['cold_ms']}ms → {now['cold_ms']}ms")
+            if now["peak_kb"] > before["peak_kb"] * (1 + threshold) and now["peak_kb"] - before["peak_kb"] > 256:
+                problems.append(f"{where}: peak memory {before['peak_kb']}KB → {now['peak_kb']}KB")
+    return problems
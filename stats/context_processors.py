@@ -1,21 +1,25 @@
-from .models import SiteSettings, Team
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 
-def pescara_team(request):
-    try:
-        team = Team.objects.get(name__iexact="Pescara")
-    except Team.DoesNotExist:
-        team = None
-    return {"pescara_team": team}
+from .site import get_site_info
+from .versioning import get_data_version
 
 
-def site_settings(request):
+def site_context(request):
     """
-    Adds SITE (the active SiteSettings, or None) and HOME_TEAM (Team) to all templates.
-    Falls back to 'Pescara' name search if no settings exist.
+    Adds SITE (the active SiteSettings, or None), HOME_TEAM (Team) and the legacy
+    pescara_team alias of HOME_TEAM to all templates, plus DATA_VERSION for
+    version-keyed {% cache %} fragments and SELF_HOSTED_FONTS (whether the
+    Montserrat woff2 subsets exist, see `manage.py subset_fonts`).
+
+    All of them are lazy: nothing is resolved unless a template actually reads
+    them, and they share the cached resolution used by the views
+    (stats/site.py), so at most one lookup happens per request.
     """
-    site = SiteSettings.objects.select_related("home_club").filter(is_active=True).first()
-    if site and site.home_club_id:
-        home_team = site.home_club
-    else:
-        home_team = Team.objects.filter(name__icontains="pescara").first()  # fallback
-    return {"SITE": site, "HOME_TEAM": home_team}
\ No newline at end of file
+    return {
+        "SITE": SimpleLazyObject(lambda: get_site_info(request).site),
+        "HOME_TEAM": SimpleLazyObject(lambda: get_site_info(request).home_team),
+        "pescara_team": SimpleLazyObject(lambda: get_site_info(request).home_team),
+        "DATA_VERSION": SimpleLazyObject(lambda: get_data_version()[0]),
+        "SELF_HOSTED_FONTS": getattr(settings, "STATS_SELF_HOSTED_FONTS", False),
+    }
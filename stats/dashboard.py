@@ -0,0 +1,103 @@
+"""
+Precomputed home page dashboard.
+
+The front page used to resolve the last/next game, the latest table, its
+team count and the home club's row on every hit. DashboardSnapshot keeps
+all of it in one row, read with its related objects in a single query.
+The row records the data version and the day it was built for (last/next
+game depend on the date). It is rebuilt after every commit that bumps the
+data version (stats/versioning.py) and by ``manage.py rebuild_dashboard``,
+to be run daily after midnight. Public pages never write it: while either
+stamp is out of date they compute the snapshot in memory.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .site import get_site_info
+from .snapshots import resolve_table
+from .versioning import get_data_version
+
+SNAPSHOT_PK = 1
+
+
+def compute_dashboard():
+    """An unsaved snapshot of the current data."""
+    from .models import DashboardSnapshot, LeagueTable, PescaraGame
+
+    version, _ = get_data_version()
+    today = timezone.localdate()
+    site_info = get_site_info()
+    home_team = site_info.home_team
+
+    games = PescaraGame.objects.select_related("opponent")
+    snapshot = DashboardSnapshot(
+        pk=SNAPSHOT_PK,
+        data_version=version,
+        built_on=today,
+        home_team=home_team,
+        total_rounds=site_info.total_rounds,
+        last_game=games.filter(date__lte=today).order_by("-date", "-jornada").first(),
+        next_game=games.filter(date__gt=today).order_by("date", "jornada").first(),
+    )
+
+    table = LeagueTable.objects.order_by("-date", "-jornada").first()
+    if table:
+        snapshot.latest_jornada = table.jornada
+        entries = resolve_table(table)  # delta tables carry the unchanged teams
+        snapshot.team_count = len(entries)
+        entry = next((e for e in entries if home_team and e.team_id == home_team.pk), None)
+        if entry:
+            snapshot.position = entry.position
+            snapshot.points = entry.points
+            snapshot.games_played = entry.played or (entry.wins + entry.draws + entry.losses)
+            snapshot.max_potential_points = snapshot.games_played * 3
+    return snapshot
+
+
+def build_dashboard():
+    """Recompute the snapshot row from the current data, save and return it."""
+    from .models import DashboardSnapshot
+
+    snapshot = compute_dashboard()
+    # an upsert, so two requests rebuilding at once cannot collide on the insert
+    DashboardSnapshot.objects.bulk_create(
+        [snapshot],
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=[f.name for f in DashboardSnapshot._meta.concrete_fields if not f.primary_key],
+    )
+    return snapshot
+
+
+def _stored_dashboard():
+    """The saved snapshot if it is current, else None."""
+    from .models import DashboardSnapshot
+
+    version, _ = get_data_version()
+    snapshot = (
+        DashboardSnapshot.objects
+        .select_related("home_team", "last_game__opponent", "next_game__opponent")
+        .filter(pk=SNAPSHOT_PK)
+        .first()
+    )
+    if snapshot is None or snapshot.data_version != version or snapshot.built_on != timezone.localdate():
+        return None
+    return snapshot
+
+
+def get_dashboard():
+    """The current snapshot, computed in memory (not saved) when the row is missing or stale."""
+    return _stored_dashboard() or compute_dashboard()
+
+
+def refresh_dashboard():
+    """Rebuild the snapshot row unless it is already current."""
+    if _stored_dashboard() is None:
+        build_dashboard()
+
+
+def schedule_dashboard_rebuild():
+    """Refresh the snapshot once the current transaction commits."""
+    # Every save in a transaction queues a callback; after the first rebuild
+    # the others only find the row current.
+    transaction.on_commit(refresh_dashboard)
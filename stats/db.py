@@ -0,0 +1,125 @@
+"""
+SQLite tuning and read/write routing.
+
+Every new SQLite connection gets the pragmas in STATS_SQLITE_PRAGMAS: WAL
+journaling lets readers keep going while the admin writes, and
+synchronous=NORMAL is durable enough under WAL at a fraction of the fsyncs.
+
+With the production profile (DJANGO_DB_PROFILE=production) settings also
+define a "replica" alias on the same file. PublicReadsMiddleware marks GET
+requests to the public views, and ReadWriteRouter sends their reads to that
+alias, whose connections are opened with query_only. All writes, and every
+read outside the public views (admin, signals, commands), use "default".
+"""
+import contextvars
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+READ_ALIAS = "replica"
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB per connection
+}
+
+_public_read = contextvars.ContextVar("stats_public_read", default=False)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "STATS_SQLITE_PRAGMAS", DEFAULT_PRAGMAS)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if connection.alias == READ_ALIAS:
+            cursor.execute("PRAGMA query_only = ON")
+
+
+def _read_alias():
+    return READ_ALIAS if READ_ALIAS in connections.settings else None
+
+
+@contextmanager
+def public_reads():
+    """Route reads inside the block like those of a public page."""
+    token = _public_read.set(True)
+    try:
+        yield
+    finally:
+        _public_read.reset(token)
+
+
+class ReadWriteRouter:
+    """Public-page reads go to the read-only alias when it is configured."""
+
+    def db_for_read(self, model, **hints):
+        if _public_read.get():
+            return _read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases are the same database file
+        aliases = {"default", READ_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == READ_ALIAS:
+            return False
+        return None
+
+
+def _public_views():
+    import stats.urls
+
+    return {p.name for p in stats.urls.urlpatterns} - {"metrics"}
+
+
+class PublicReadsMiddleware:
+    """Marks GET/HEAD requests to the views of stats/urls.py as public reads."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.public = _public_views()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            if getattr(request, "_public_read", False):
+                _public_read.set(False)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            if getattr(request, "_public_read", False):
+                _public_read.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Under ASGI this runs through sync_to_async, which copies the context
+        # back, so the flag is set by value rather than with a reset token.
+        match = request.resolver_match
+        if request.method in ("GET", "HEAD") and match and match.url_name in self.public:
+            request._public_read = True
+            _public_read.set(True)
@@ -0,0 +1,140 @@
+"""
+Streaming CSV / NDJSON exports of games, appearances and league tables.
+
+Each dataset is a generator of rows read with `.iterator(chunk_size=...)`
+(league tables through the snapshot resolver, so delta tables come out
+complete), and export_chunks() turns it into text in batches of lines. The
+same generator feeds the export_view (as a StreamingHttpResponse) and
+`manage.py export_stats`, so memory stays flat however long the history is.
+The view produces its chunks through public_chunks(), so their reads go to
+the read-only alias like those of any public page.
+"""
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+
+from .db import public_reads
+from .models import Appearance, PescaraGame, Team
+from .snapshots import ENTRY_FIELDS, resolved_rows
+
+CHUNK_SIZE = 2000
+LINES_PER_CHUNK = 500
+FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def parse_filters(params):
+    """from / to (YYYY-MM-DD) and jornada, as in matches_view; bad values are ignored."""
+    def day(key):
+        try:
+            return parse_date(params.get(key) or "")
+        except ValueError:
+            return None
+
+    jornada = params.get("jornada") or ""
+    return {
+        "from": day("from"),
+        "to": day("to"),
+        "jornada": int(jornada) if str(jornada).isdigit() else None,
+    }
+
+
+def _games(filters):
+    qs = PescaraGame.objects.order_by("date", "jornada")
+    if filters["from"]:
+        qs = qs.filter(date__gte=filters["from"])
+    if filters["to"]:
+        qs = qs.filter(date__lte=filters["to"])
+    if filters["jornada"] is not None:
+        qs = qs.filter(jornada=filters["jornada"])
+    return qs
+
+
+def game_rows(filters):
+    columns = ["jornada", "date", "opponent__name", "goals_for", "goals_against", "result"]
+    yield ["jornada", "date", "opponent", "goals_for", "goals_against", "result"]
+    yield from _games(filters).values_list(*columns).iterator(chunk_size=CHUNK_SIZE)
+
+
+def appearance_rows(filters):
+    yield ["jornada", "date", "opponent", "number", "first_name", "last_name", "goals"]
+    games = _games(filters)
+    yield from (
+        Appearance.objects
+        .filter(game__in=games.values("pk"))
+        .order_by("game__date", "game__jornada", "player__number")
+        .values_list("game__jornada", "game__date", "game__opponent__name",
+                     "player__number", "player__first_name", "player__last_name", "goals")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def table_rows(filters):
+    yield ["date", "jornada", "team", *ENTRY_FIELDS]
+    names = dict(Team.objects.order_by().values_list("pk", "name"))
+    # every table is resolved from the start: a delta table needs its predecessors
+    for _, day, jornada, state in resolved_rows(ENTRY_FIELDS, until=filters["to"]):
+        if filters["from"] and day < filters["from"]:
+            continue
+        if filters["jornada"] is not None and jornada != filters["jornada"]:
+            continue
+        for team_id, values in sorted(state.items(), key=lambda item: item[1]):  # by position
+            yield [day, jornada, names.get(team_id, ""), *values]
+
+
+DATASETS = {"partidos": game_rows, "apariciones": appearance_rows, "tablas": table_rows}
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_chunks(dataset, fmt, filters):
+    """Text chunks of about LINES_PER_CHUNK lines of the export."""
+    rows = DATASETS[dataset](filters)
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        lines = (writer.writerow(row) for row in rows)
+    else:
+        header = next(rows)
+        lines = (json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+                 for row in rows)
+
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= LINES_PER_CHUNK:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def public_chunks(chunks):
+    """
+    Produce each chunk inside public_reads(): the body streams after
+    PublicReadsMiddleware has cleared the flag, and under ASGI each chunk is
+    produced in a sync thread with its own copy of the context.
+    """
+    while True:
+        with public_reads():
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def aiter_chunks(chunks):
+    """
+    Serve a sync chunk generator to an ASGI response without buffering it:
+    each chunk is produced in the sync thread (where its cursor lives).
+    """
+    done = object()
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, done)) is not done:
+        yield chunk
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from stats.benchmarks import compare, run_view_benchmarks
+from stats.synthetic import generate_league
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every view in stats/urls.py over synthetic leagues of several "
+        "sizes (in a throwaway test database). Writes the results as JSON and "
+        "fails when a view regresses against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1,3,6",
+                            help="Comma-separated number of synthetic seasons per run.")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per measurement.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--baseline", help="Compare against this JSON file.")
+        parser.add_argument("--threshold", type=float, default=0.5,
+                            help="Allowed relative growth of time/memory (0.5 = +50%%).")
+
+    def handle(self, *args, **opts):
+        try:
+            sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+
+        baseline = None
+        if opts["baseline"]:
+            baseline = json.loads(Path(opts["baseline"]).read_text())
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            results = {}
+            for seasons in sizes:
+                call_command("flush", interactive=False, verbosity=0)
+                counts = generate_league(seasons=seasons, teams=max(20, seasons + 1), seed=opts["seed"])
+                self.stdout.write(f"\n{seasons} temporada(s): {counts}")
+                results[str(seasons)] = views = run_view_benchmarks(repeat=opts["repeat"])
+                for name, m in views.items():
+                    self.stdout.write(
+                        f"  {name:22} {m['status']}  cold {m['cold_ms']:8.2f}ms  "
+                        f"warm {m['warm_ms']:7.2f}ms  {m['queries']:3d} q  {m['peak_kb']:9.1f}KB"
+                    )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if opts["output"]:
+            Path(opts["output"]).write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(f"\nResultados guardados en {opts['output']}")
+
+        if baseline is not None:
+            problems = compare(results, baseline, threshold=opts["threshold"])
+            if problems:
+                raise CommandError("Regresiones de rendimiento:\n  " + "\n  ".join(problems))
+            self.stdout.write(self.style.SUCCESS("Sin regresiones frente a la línea base."))
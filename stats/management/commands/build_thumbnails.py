@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from stats.models import Player, Team
+from stats.thumbnails import refresh_thumbnails
+from stats.versioning import bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Create the resized variants of every team logo and player photo (see stats/thumbnails.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true",
+                            help="Rebuild the variants even when they look current.")
+
+    def handle(self, *args, **options):
+        updated = 0
+        for model, field in ((Team, "logo"), (Player, "photo")):
+            images = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            for obj in images.iterator():
+                updated += refresh_thumbnails(obj, force=options["force"])
+        if updated:
+            # rows were updated without signals; cached pages still point at the originals
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Miniaturas actualizadas: {updated} imágenes."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from stats.snapshots import encode_deltas, expand_deltas
+from stats.standings import refresh_standings
+from stats.versioning import bump_data_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the LeagueTables as deltas: drop the entries equal to the previous "
+        "table (see stats/snapshots.py). With --expand, store every table in full again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--expand", action="store_true",
+                            help="Materialize every delta table instead.")
+
+    def handle(self, *args, **options):
+        if options["expand"]:
+            tables, entries = expand_deltas()
+            message = f"Tablas completadas: {tables} ({entries} filas agregadas)."
+        else:
+            tables, entries = encode_deltas()
+            message = f"Tablas compactadas: {tables} ({entries} filas eliminadas)."
+        # raw SQL and bulk inserts send no signals
+        refresh_standings()
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stats.exports import DATASETS, FORMATS, export_chunks, parse_filters
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream games (partidos), appearances (apariciones) or league tables (tablas) "
+        "as CSV or NDJSON to stdout or a file, in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--from", dest="from", help="First date (YYYY-MM-DD).")
+        parser.add_argument("--to", help="Last date (YYYY-MM-DD).")
+        parser.add_argument("--jornada", type=int)
+        parser.add_argument("-o", "--output", help="File to write (default: stdout).")
+
+    def handle(self, *args, **opts):
+        filters = parse_filters({k: opts[k] for k in ("from", "to", "jornada")})
+        for key in ("from", "to"):
+            if opts[key] and not filters[key]:
+                raise CommandError(f"Fecha inválida para --{key}: {opts[key]}")
+
+        chunks = export_chunks(opts["dataset"], opts["format"], filters)
+        if not opts["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(opts["output"], "w", encoding="utf-8", newline="") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exportado a {opts['output']}"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stats.synthetic import generate_league
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic seasons (teams, squad, games with appearances and a "
+        "LeagueTable snapshot per jornada) to see how the site behaves at scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seasons", type=int, default=1)
+        parser.add_argument("--rounds", type=int, default=None,
+                            help="Jornadas per season (default: SiteSettings.max_rounds).")
+        parser.add_argument("--teams", type=int, default=None,
+                            help="Teams in the league, home club included (default: random 20–25).")
+        parser.add_argument("--squad", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--prefix", default="Sintético", help="Name prefix for the generated teams.")
+
+    def handle(self, *args, **opts):
+        try:
+            counts = generate_league(
+                seasons=opts["seasons"], rounds=opts["rounds"], teams=opts["teams"],
+                squad=opts["squad"], seed=opts["seed"], prefix=opts["prefix"],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        summary = ", ".join(f"{k}={v}" for k, v in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Liga sintética creada: {summary}"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stats.season_import import BATCH_SIZE, KINDS, SeasonImportError, kind_from_name, import_season
+
+
+class Command(BaseCommand):
+    help = (
+        "Import seasons from CSV/NDJSON files (equipos, jugadores, partidos, apariciones, "
+        "tablas; the layout of export_stats) with batched upserts. See stats/season_import.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Files; their kind comes from a 'type' field or the name.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help="Records per transaction.")
+
+    def handle(self, *args, **opts):
+        # games before their appearances, whatever order the files were given in
+        order = {kind: i for i, kind in enumerate(KINDS)}
+        paths = sorted(opts["paths"], key=lambda p: order.get(kind_from_name(p), -1))
+
+        elapsed = 0.0
+
+        def progress(done, seconds):
+            nonlocal elapsed
+            elapsed = seconds
+            self.stdout.write(f"{done} registros · {done / seconds if seconds else 0:.0f} registros/s")
+
+        try:
+            counts = import_season(paths, batch_size=opts["batch_size"], progress=progress)
+        except (SeasonImportError, OSError, UnicodeDecodeError) as exc:
+            raise CommandError(exc)
+        total = sum(counts.values())
+        summary = ", ".join(f"{k}={v}" for k, v in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados {total} registros en {elapsed:.1f}s ({summary})."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from stats.dashboard import build_dashboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the home page DashboardSnapshot. Run it daily after midnight: "
+        "the last/next game depend on the date and public pages never save the row."
+    )
+
+    def handle(self, *args, **options):
+        snapshot = build_dashboard()
+        self.stdout.write(self.style.SUCCESS(
+            f"Portada reconstruida para el {snapshot.built_on:%d/%m/%Y} (versión {snapshot.data_version})."
+        ))
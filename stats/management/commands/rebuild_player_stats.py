@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stats.models import PlayerStats
+from stats.player_stats import refresh_player_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the PlayerStats table from scratch using every Appearance."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            PlayerStats.objects.all().delete()
+            total = refresh_player_stats()
+        self.stdout.write(self.style.SUCCESS(f"PlayerStats reconstruidas: {total} jugadores."))
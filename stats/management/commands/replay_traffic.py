@@ -0,0 +1,168 @@
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from stats.metrics import _percentile
+from stats.models import PescaraGame, Player
+
+DEFAULT_MIX = "home=50,standings=20,players=20,match_detail=10"
+
+
+def _parse_mix(value):
+    """ "home=50,players=20" -> [("home", 50.0), ("players", 20.0)] """
+    mix = []
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        try:
+            mix.append((name.strip(), float(weight)))
+        except ValueError:
+            raise CommandError(f"Bad traffic mix entry: {part!r} (expected name=weight).")
+    if not mix or sum(w for _, w in mix) <= 0:
+        raise CommandError("The traffic mix needs at least one positive weight.")
+    return mix
+
+
+class _WSGIClient:
+    """Calls the WSGI application in-process, the way a server thread would."""
+
+    def __init__(self, host):
+        from pescara_site.wsgi import application
+
+        self.application = application
+        self.host = host
+
+    def get(self, path):
+        status = []
+        path, _, query = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": "80",
+            "HTTP_HOST": self.host,
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(),
+            "wsgi.errors": BytesIO(),
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        body = self.application(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            size = sum(len(chunk) for chunk in body)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+        return int(status[0].split()[0]), size
+
+
+class _HTTPClient:
+    """Requests against a running server (e.g. manage.py runserver)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=30) as resp:
+                return resp.status, len(resp.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a match-day traffic mix against the site, in-process through "
+        "pescara_site.wsgi or against a running server (--url), and report "
+        "throughput and p50/p95/p99 latency per URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mix", default=DEFAULT_MIX,
+                            help=f"URL names from stats/urls.py with weights (default: {DEFAULT_MIX}).")
+        parser.add_argument("--requests", type=int, default=1000, help="Total requests to send.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Worker threads.")
+        parser.add_argument("--url", default="",
+                            help="Base URL of a running server; in-process WSGI when omitted.")
+        parser.add_argument("--host", default="localhost", help="Host header for in-process requests.")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def _paths(self, mix):
+        """URL name -> candidate paths (detail views spread over existing objects)."""
+        game_ids = list(PescaraGame.objects.values_list("pk", flat=True)[:200])
+        player_ids = list(Player.objects.filter(active=True).values_list("pk", flat=True)[:200])
+        paths = {}
+        for name, _ in mix:
+            if name in ("match_detail", "match_appearances"):
+                ids = game_ids
+            elif name == "player_detail":
+                ids = player_ids
+            else:
+                ids = None
+            try:
+                paths[name] = [reverse(name, args=[pk]) for pk in ids] if ids is not None else [reverse(name)]
+            except Exception as exc:
+                raise CommandError(f"Cannot build a URL for {name!r}: {exc}")
+            if not paths[name]:
+                raise CommandError(f"No objects to request for {name!r}; generate some data first.")
+        return paths
+
+    def handle(self, *args, **opts):
+        mix = _parse_mix(opts["mix"])
+        paths = self._paths(mix)
+        rng = random.Random(opts["seed"])
+        names = rng.choices([n for n, _ in mix], weights=[w for _, w in mix], k=opts["requests"])
+        plan = [(name, rng.choice(paths[name])) for name in names]
+
+        client = _HTTPClient(opts["url"]) if opts["url"] else _WSGIClient(opts["host"])
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+
+        def hit(item):
+            name, path = item
+            started = time.perf_counter()
+            try:
+                status, _ = client.get(path)
+            except Exception:
+                status = 599
+            ms = (time.perf_counter() - started) * 1000
+            with lock:
+                samples[name].append(ms)
+                if status >= 400:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            list(pool.map(hit, plan))
+        wall = time.perf_counter() - started
+
+        target = opts["url"] or "WSGI en proceso"
+        self.stdout.write(
+            f"{len(plan)} peticiones · concurrencia {opts['concurrency']} · {target}\n"
+            f"Rendimiento: {len(plan) / wall:.1f} req/s en {wall:.2f}s\n"
+        )
+        self.stdout.write(f"{'vista':20} {'n':>6} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5}")
+        for name, _ in mix:
+            ms = sorted(samples[name])
+            if not ms:
+                continue
+            self.stdout.write(
+                f"{name:20} {len(ms):6d} {len(ms) / wall:8.1f} "
+                f"{statistics.median(ms):7.1f}ms {_percentile(ms, 95):7.1f}ms {_percentile(ms, 99):7.1f}ms "
+                f"{errors[name]:5d}"
+            )
+        if sum(errors.values()):
+            self.stderr.write(self.style.WARNING(f"{sum(errors.values())} respuestas con error."))
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+STATIC_DIR = Path(__file__).resolve().parents[2] / "static" / "stats"
+
+# weight -> file name of the Montserrat static TTF (as distributed under the OFL)
+WEIGHTS = {400: "Montserrat-Regular.ttf", 600: "Montserrat-SemiBold.ttf", 700: "Montserrat-Bold.ttf"}
+
+# Latin + Latin-1 (Spanish, Italian club names) and the symbols the pages use
+UNICODE_RANGE = "U+0000-00FF, U+0131, U+0152-0153, U+2013-2014, U+2018-201E, U+2026, U+20AC, U+2190-2193, U+2212, U+25B2, U+25BC, U+2713"
+
+FACE = (
+    "@font-face{{ font-family:'Montserrat'; font-style:normal; font-weight:{weight}; font-display:swap; "
+    "src:local('{local}'), url('../fonts/{file}') format('woff2'); unicode-range:{range} }}\n"
+)
+LOCAL_NAMES = {400: "Montserrat", 600: "Montserrat SemiBold", 700: "Montserrat Bold"}
+
+
+def _unicodes():
+    codes = []
+    for part in UNICODE_RANGE.split(","):
+        first, _, last = part.strip()[2:].partition("-")
+        codes.extend(range(int(first, 16), int(last or first, 16) + 1))
+    return codes
+
+
+class Command(BaseCommand):
+    help = (
+        "Subset the Montserrat TTFs in SOURCE_DIR to Latin woff2 files in "
+        "stats/static/stats/fonts/ and point stats/css/fonts.css at them. "
+        "Needs fontTools and brotli (pip install fonttools brotli)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source_dir", help="Directory with " + ", ".join(WEIGHTS.values()))
+
+    def handle(self, *args, **options):
+        try:
+            from fontTools import subset
+        except ImportError:
+            raise CommandError("fontTools no está instalado: pip install fonttools brotli")
+
+        source = Path(options["source_dir"])
+        missing = [name for name in WEIGHTS.values() if not (source / name).exists()]
+        if missing:
+            raise CommandError(f"Faltan en {source}: {', '.join(missing)}")
+
+        fonts_dir = STATIC_DIR / "fonts"
+        fonts_dir.mkdir(exist_ok=True)
+        css = [
+            "/* Montserrat, self-hosted (no third-party request before first paint).\n"
+            "   Written by `manage.py subset_fonts`. */\n"
+        ]
+        for weight, name in WEIGHTS.items():
+            opts = subset.Options()
+            opts.flavor = "woff2"
+            font = subset.load_font(source / name, opts)
+            subsetter = subset.Subsetter(opts)
+            subsetter.populate(unicodes=_unicodes())
+            subsetter.subset(font)
+            out = f"montserrat-latin-{weight}.woff2"
+            subset.save_font(font, fonts_dir / out, opts)
+            css.append(FACE.format(weight=weight, local=LOCAL_NAMES[weight], file=out, range=UNICODE_RANGE))
+            self.stdout.write(f"{out}: {(fonts_dir / out).stat().st_size // 1024} KiB")
+
+        (STATIC_DIR / "css" / "fonts.css").write_text("".join(css), encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS("Fuentes generadas; corre collectstatic para publicarlas."))
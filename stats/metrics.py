@@ -0,0 +1,206 @@
+"""
+Per-view request metrics kept in process memory.
+
+RequestMetricsMiddleware records, for every request resolved to a view of
+stats/urls.py, its wall time, number of queries, database time and response
+size (a streamed response once its body has been sent). Each view keeps
+cumulative latency buckets (Prometheus histogram) plus a rolling window of
+recent requests for percentiles. Every worker process keeps its own numbers.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+WINDOW = getattr(settings, "STATS_METRICS_WINDOW", 500)
+
+
+class _ViewStats:
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.sum_ms = 0.0
+        self.sum_queries = 0
+        self.sum_db_ms = 0.0
+        self.sum_bytes = 0
+        self.window = deque(maxlen=WINDOW)  # (ms, queries, db_ms, bytes)
+
+
+_lock = threading.Lock()
+_views = {}
+
+
+def record(view_name, ms, queries, db_ms, size):
+    with _lock:
+        st = _views.get(view_name)
+        if st is None:
+            st = _views[view_name] = _ViewStats()
+        st.count += 1
+        st.sum_ms += ms
+        st.sum_queries += queries
+        st.sum_db_ms += db_ms
+        st.sum_bytes += size
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                st.buckets[i] += 1
+        st.window.append((ms, queries, db_ms, size))
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def snapshot():
+    """One dict per view (sorted by name) summarizing the rolling window."""
+    with _lock:
+        items = [(name, st.count, list(st.window)) for name, st in sorted(_views.items())]
+
+    rows = []
+    for name, count, window in items:
+        n = len(window) or 1
+        ms = sorted(w[0] for w in window)
+        rows.append({
+            "view": name,
+            "count": count,
+            "window": len(window),
+            "p50_ms": round(_percentile(ms, 50), 1),
+            "p95_ms": round(_percentile(ms, 95), 1),
+            "p99_ms": round(_percentile(ms, 99), 1),
+            "max_ms": round(ms[-1], 1) if ms else 0,
+            "avg_queries": round(sum(w[1] for w in window) / n, 1),
+            "max_queries": max((w[1] for w in window), default=0),
+            "avg_db_ms": round(sum(w[2] for w in window) / n, 1),
+            "avg_kb": round(sum(w[3] for w in window) / n / 1024, 1),
+        })
+    return rows
+
+
+def prometheus_text():
+    """Cumulative counters in the Prometheus text exposition format."""
+    with _lock:
+        items = [
+            (name, st.count, list(st.buckets), st.sum_ms, st.sum_queries, st.sum_db_ms, st.sum_bytes)
+            for name, st in sorted(_views.items())
+        ]
+
+    lines = [
+        "# HELP stats_request_duration_seconds Wall time per request.",
+        "# TYPE stats_request_duration_seconds histogram",
+    ]
+    for name, count, buckets, sum_ms, *_ in items:
+        for bound, n in zip(LATENCY_BUCKETS_MS, buckets):
+            lines.append(f'stats_request_duration_seconds_bucket{{view="{name}",le="{bound / 1000:g}"}} {n}')
+        lines.append(f'stats_request_duration_seconds_bucket{{view="{name}",le="+Inf"}} {count}')
+        lines.append(f'stats_request_duration_seconds_sum{{view="{name}"}} {sum_ms / 1000:.6f}')
+        lines.append(f'stats_request_duration_seconds_count{{view="{name}"}} {count}')
+
+    for metric, help_text, index, scale in (
+        ("stats_db_queries_total", "Database queries issued.", 4, 1),
+        ("stats_db_duration_seconds_total", "Time spent in database queries.", 5, 1000),
+        ("stats_response_bytes_total", "Response body bytes.", 6, 1),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for item in items:
+            value = item[index] / scale
+            lines.append(f'{metric}{{view="{item[0]}"}} {value:g}')
+    return "\n".join(lines) + "\n"
+
+
+# --------------------
+# Middleware
+# --------------------
+
+class _QueryTimer:
+    """connection.execute_wrapper that counts queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _tracked_views():
+    import stats.urls
+
+    return {p.name for p in stats.urls.urlpatterns} - {"metrics"}
+
+
+class RequestMetricsMiddleware:
+    # Sync-only on purpose: under ASGI Django runs it in the thread-sensitive
+    # worker thread, next to the views' sync_to_async() code and its database
+    # connections, so the query wrappers see every query.
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.tracked = _tracked_views()
+
+    def _timed(self, timer):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(timer))
+        return stack
+
+    def _record(self, request, response, started, timer):
+        match = getattr(request, "resolver_match", None)
+        if not (match and match.url_name in self.tracked):
+            return response
+        if response.streaming:
+            # the body (and its queries) comes after the view returns: record
+            # once it has been sent
+            stream = self._astream if response.is_async else self._stream
+            response.streaming_content = stream(match.url_name, response.streaming_content, started, timer)
+            return response
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        record(match.url_name, elapsed_ms, timer.count, timer.seconds * 1000, len(response.content))
+        return response
+
+    def _stream(self, name, chunks, started, timer):
+        size = 0
+        try:
+            while True:
+                with self._timed(timer):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                size += len(chunk)
+                yield chunk
+        finally:
+            record(name, (time.perf_counter() - started) * 1000, timer.count, timer.seconds * 1000, size)
+
+    async def _astream(self, name, chunks, started, timer):
+        # chunks produced in sync threads run their queries outside the timer
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            record(name, (time.perf_counter() - started) * 1000, timer.count, timer.seconds * 1000, size)
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with self._timed(timer):
+            response = self.get_response(request)
+        return self._record(request, response, started, timer)
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.24 on 2026-10-16 23:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+
+def summarize_appearances(apps):
+    # frozen copy of stats.player_stats.summarize_appearances as of this migration
+    games = goals = streak = best = 0
+    first = last = None
+    for day, scored in apps:
+        games += 1
+        goals += scored or 0
+        if first is None:
+            first = day
+        last = day
+        streak = streak + 1 if scored else 0
+        best = max(best, streak)
+
+    return {
+        "games_played": games,
+        "goals": goals,
+        "goals_per_match": round(goals / games, 2) if games else 0,
+        "first_appearance": first,
+        "last_appearance": last,
+        "scoring_streak": streak,
+        "best_scoring_streak": best,
+    }
+
+
+def populate_player_stats(apps, schema_editor):
+    Player = apps.get_model("stats", "Player")
+    Appearance = apps.get_model("stats", "Appearance")
+    PlayerStats = apps.get_model("stats", "PlayerStats")
+
+    by_player = {}
+    rows = (
+        Appearance.objects
+        .order_by("player_id", "game__date", "game__jornada")
+        .values_list("player_id", "game__date", "goals")
+    )
+    for pid, day, goals in rows:
+        by_player.setdefault(pid, []).append((day, goals))
+
+    PlayerStats.objects.bulk_create(
+        PlayerStats(player_id=pid, **summarize_appearances(by_player.get(pid, ())))
+        for pid in Player.objects.values_list("pk", flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0004_sitesettings_max_rounds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('goals', models.PositiveIntegerField(default=0)),
+                ('goals_per_match', models.FloatField(default=0)),
+                ('first_appearance', models.DateField(blank=True, null=True)),
+                ('last_appearance', models.DateField(blank=True, null=True)),
+                ('scoring_streak', models.PositiveIntegerField(default=0)),
+                ('best_scoring_streak', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='stats.player')),
+            ],
+            options={
+                'verbose_name_plural': 'player stats',
+            },
+        ),
+        migrations.RunPython(populate_player_stats, migrations.RunPython.noop),
+    ]
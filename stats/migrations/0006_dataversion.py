@@ -0,0 +1,28 @@
+# Generated by Django 4.2.24 on 2026-10-16 23:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_version_row(apps, schema_editor):
+    DataVersion = apps.get_model("stats", "DataVersion")
+    DataVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0005_playerstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
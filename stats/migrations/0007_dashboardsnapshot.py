@@ -0,0 +1,33 @@
+# Generated by Django 4.2.24 on 2026-10-17 00:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0006_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_version', models.PositiveBigIntegerField(default=0)),
+                ('built_on', models.DateField(blank=True, null=True)),
+                ('total_rounds', models.PositiveSmallIntegerField(default=25)),
+                ('latest_jornada', models.PositiveIntegerField(blank=True, null=True)),
+                ('team_count', models.PositiveIntegerField(default=0)),
+                ('position', models.PositiveIntegerField(blank=True, null=True)),
+                ('points', models.IntegerField(blank=True, null=True)),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('max_potential_points', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('home_team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='stats.team')),
+                ('last_game', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='stats.pescaragame')),
+                ('next_game', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='stats.pescaragame')),
+            ],
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.24 on 2026-10-17 00:14
+
+from bisect import bisect_right
+
+from django.db import migrations, models
+
+
+def populate_standings(apps, schema_editor):
+    # frozen copy of stats.standings as of this migration (every table
+    # stores all its entries)
+    LeagueTable = apps.get_model("stats", "LeagueTable")
+    LeagueTableEntry = apps.get_model("stats", "LeagueTableEntry")
+    PescaraGame = apps.get_model("stats", "PescaraGame")
+
+    order = list(LeagueTable.objects.order_by("date", "jornada").values_list("pk", "date"))
+    previous = {pk: order[i - 1][0] if i else None for i, (pk, _) in enumerate(order)}
+    dates = dict(order)
+
+    positions = {}
+    for table_id, team_id, pos in LeagueTableEntry.objects.values_list("table_id", "team_id", "position"):
+        positions.setdefault(table_id, {})[team_id] = pos
+
+    games = {}
+    for opp_id, day, result in PescaraGame.objects.order_by("date", "jornada").values_list(
+        "opponent_id", "date", "result"
+    ):
+        days, results = games.setdefault(opp_id, ([], []))
+        days.append(day)
+        results.append(result)
+
+    entries = list(LeagueTableEntry.objects.only("pk", "table_id", "team_id", "position"))
+    for entry in entries:
+        prev_pos = positions.get(previous[entry.table_id], {}).get(entry.team_id)
+        entry.pos_delta = prev_pos - entry.position if prev_pos is not None else None
+        days, results = games.get(entry.team_id, ((), ()))
+        i = bisect_right(days, dates[entry.table_id])
+        entry.last_result_vs_home = results[i - 1] if i else ""
+    LeagueTableEntry.objects.bulk_update(entries, ["pos_delta", "last_result_vs_home"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0007_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguetableentry',
+            name='last_result_vs_home',
+            field=models.CharField(blank=True, choices=[('W', 'Win'), ('D', 'Draw'), ('L', 'Loss')], default='', editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='leaguetableentry',
+            name='pos_delta',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
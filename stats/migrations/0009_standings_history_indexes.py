@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-17 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0008_leaguetableentry_derived'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaguetable',
+            index=models.Index(fields=['date', 'jornada'], name='stats_table_date_jornada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaguetableentry',
+            index=models.Index(fields=['team', 'table'], name='stats_entry_team_table_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0009_standings_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguetable',
+            name='storage',
+            field=models.CharField(choices=[('full', 'Completa'), ('delta', 'Solo cambios')], default='full', editable=False, max_length=5),
+        ),
+    ]
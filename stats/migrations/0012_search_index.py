@@ -0,0 +1,58 @@
+# Full-text index of player and team names, see stats/search.py.
+# rowid = 2 * pk for players and 2 * pk + 1 for teams, so the triggers
+# update and delete by rowid.
+
+from django.db import migrations
+
+PLAYER_NAME = "{row}.first_name || ' ' || {row}.last_name"
+
+SQL = f"""
+CREATE VIRTUAL TABLE stats_search USING fts5(
+    name, kind UNINDEXED, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+INSERT INTO stats_search(rowid, name, kind)
+    SELECT 2 * id, {PLAYER_NAME.format(row="p")}, 'player' FROM stats_player p;
+INSERT INTO stats_search(rowid, name, kind)
+    SELECT 2 * id + 1, name, 'team' FROM stats_team;
+
+CREATE TRIGGER stats_search_player_insert AFTER INSERT ON stats_player BEGIN
+    INSERT INTO stats_search(rowid, name, kind) VALUES (2 * new.id, {PLAYER_NAME.format(row="new")}, 'player');
+END;
+CREATE TRIGGER stats_search_player_update AFTER UPDATE OF first_name, last_name ON stats_player BEGIN
+    UPDATE stats_search SET name = {PLAYER_NAME.format(row="new")} WHERE rowid = 2 * old.id;
+END;
+CREATE TRIGGER stats_search_player_delete AFTER DELETE ON stats_player BEGIN
+    DELETE FROM stats_search WHERE rowid = 2 * old.id;
+END;
+
+CREATE TRIGGER stats_search_team_insert AFTER INSERT ON stats_team BEGIN
+    INSERT INTO stats_search(rowid, name, kind) VALUES (2 * new.id + 1, new.name, 'team');
+END;
+CREATE TRIGGER stats_search_team_update AFTER UPDATE OF name ON stats_team BEGIN
+    UPDATE stats_search SET name = new.name WHERE rowid = 2 * old.id + 1;
+END;
+CREATE TRIGGER stats_search_team_delete AFTER DELETE ON stats_team BEGIN
+    DELETE FROM stats_search WHERE rowid = 2 * old.id + 1;
+END;
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER stats_search_player_insert;
+DROP TRIGGER stats_search_player_update;
+DROP TRIGGER stats_search_player_delete;
+DROP TRIGGER stats_search_team_insert;
+DROP TRIGGER stats_search_team_update;
+DROP TRIGGER stats_search_team_delete;
+DROP TABLE stats_search;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0011_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL, REVERSE_SQL),
+    ]
@@ -1,10 +1,14 @@
 from django.db import models
 from django.utils import timezone
 
+from .thumbnails import Thumbnails
+
 # 1) Equipos
 class Team(models.Model):
     name = models.CharField(max_length=80, unique=True)
     logo = models.ImageField(upload_to="team_logos/", blank=True, null=True)
+    # resized copies of the logo, see stats/thumbnails.py
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         ordering = ["name"]
@@ -12,12 +16,17 @@ class Team(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def logo_thumbs(self):
+        return Thumbnails(self.logo, self.logo_variants)
+
 # 2) Jugadores (solo Pescara)
 class Player(models.Model):
     first_name = models.CharField(max_length=40)
     last_name  = models.CharField(max_length=40)
     number     = models.PositiveIntegerField()
     photo      = models.ImageField(upload_to="players/", blank=True, null=True)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)  # stats/thumbnails.py
     active     = models.BooleanField(default=True)
 
     class Meta:
@@ -28,6 +37,10 @@ class Player(models.Model):
     def short_name(self):
         return f"{self.first_name[0]}. {self.last_name}"
 
+    @property
+    def photo_thumbs(self):
+        return Thumbnails(self.photo, self.photo_variants)
+
     def __str__(self):
         return f"{self.number} · {self.short_name}"
 
@@ -67,12 +80,17 @@ class Appearance(models.Model):
 
 # 4) Tabla (snapshot semanal editable)
 class LeagueTable(models.Model):
+    STORAGE_CHOICES = (("full", "Completa"), ("delta", "Solo cambios"))
+
     jornada = models.PositiveIntegerField()
     date    = models.DateField(default=timezone.now)
+    # "delta" tables only store the entries that changed, see stats/snapshots.py
+    storage = models.CharField(max_length=5, choices=STORAGE_CHOICES, default="full", editable=False)
 
     class Meta:
         ordering = ["-date", "-jornada"]
         unique_together = ("jornada", "date")
+        indexes = [models.Index(fields=["date", "jornada"], name="stats_table_date_jornada_idx")]
 
     def __str__(self):
         return f"Tabla J{self.jornada} – {self.date}"
@@ -87,14 +105,23 @@ class LeagueTableEntry(models.Model):
     losses          = models.PositiveIntegerField(default=0)      # JP
     points          = models.IntegerField(default=0)              # Pts
     goal_difference = models.IntegerField(default=0)              # DG
+    # derived, see stats/standings.py
+    pos_delta           = models.IntegerField(blank=True, null=True, editable=False)  # + = subió
+    last_result_vs_home = models.CharField(max_length=1, blank=True, default="", editable=False,
+                                           choices=PescaraGame.RESULT_CHOICES)
 
     class Meta:
         unique_together = ("table", "team")
         ordering = ["table", "position"]
+        indexes = [models.Index(fields=["team", "table"], name="stats_entry_team_table_idx")]
 
     def __str__(self):
         return f"J{self.table.jornada} #{self.position} {self.team} ({self.points} pts, DG {self.goal_difference})"
 
+    @property
+    def pos_delta_abs(self):
+        return abs(self.pos_delta) if self.pos_delta is not None else None
+
 # 5) Modelo para settings
 from django.core.exceptions import ValidationError
 
@@ -124,4 +151,53 @@ class SiteSettings(models.Model):
 
     def __str__(self):
         name = self.site_name or (self.home_club.name if self.home_club_id else "Site")
-        return f"{name} ({'active' if self.is_active else 'inactive'})"
\ No newline at end of file
+        return f"{name} ({'active' if self.is_active else 'inactive'})"
+
+# 6) Estadísticas por jugador (desnormalizadas, ver stats/player_stats.py)
+class PlayerStats(models.Model):
+    player              = models.OneToOneField(Player, on_delete=models.CASCADE, related_name="stats")
+    games_played        = models.PositiveIntegerField(default=0)   # PJ
+    goals               = models.PositiveIntegerField(default=0)   # G
+    goals_per_match     = models.FloatField(default=0)             # G/P
+    first_appearance    = models.DateField(blank=True, null=True)
+    last_appearance     = models.DateField(blank=True, null=True)
+    scoring_streak      = models.PositiveIntegerField(default=0)   # partidos seguidos anotando (actual)
+    best_scoring_streak = models.PositiveIntegerField(default=0)
+    updated_at          = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "player stats"
+
+    def __str__(self):
+        return f"{self.player} – {self.games_played} PJ, {self.goals} G"
+
+
+# 7) Versión global de los datos (ver stats/versioning.py)
+class DataVersion(models.Model):
+    """Single row bumped on every data change; drives ETags and page caches."""
+    version    = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"v{self.version} ({self.updated_at:%Y-%m-%d %H:%M})"
+
+
+# 8) Portada precalculada (ver stats/dashboard.py)
+class DashboardSnapshot(models.Model):
+    """Single row with everything the home page shows; rebuilt on data changes."""
+    data_version         = models.PositiveBigIntegerField(default=0)
+    built_on             = models.DateField(blank=True, null=True)   # last/next game depend on the day
+    home_team            = models.ForeignKey(Team, on_delete=models.SET_NULL, blank=True, null=True, related_name="+")
+    total_rounds         = models.PositiveSmallIntegerField(default=25)
+    latest_jornada       = models.PositiveIntegerField(blank=True, null=True)
+    team_count           = models.PositiveIntegerField(default=0)
+    position             = models.PositiveIntegerField(blank=True, null=True)
+    points               = models.IntegerField(blank=True, null=True)
+    games_played         = models.PositiveIntegerField(default=0)
+    max_potential_points = models.PositiveIntegerField(default=0)
+    last_game            = models.ForeignKey(PescaraGame, on_delete=models.SET_NULL, blank=True, null=True, related_name="+")
+    next_game            = models.ForeignKey(PescaraGame, on_delete=models.SET_NULL, blank=True, null=True, related_name="+")
+    updated_at           = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Portada v{self.data_version} ({self.built_on})"
@@ -0,0 +1,114 @@
+"""
+Server-side cache of the rendered public pages.
+
+Entries are keyed by the data version (stats/versioning.py), the path and
+the query parameters each view actually reads, so any data change simply
+moves every page to new keys; old entries expire on their own. Hits and
+misses are counted per view and shown in the admin (DataVersion changelist).
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .versioning import get_data_version
+
+PAGE_CACHE_TIMEOUT = getattr(settings, "STATS_PAGE_CACHE_TIMEOUT", 60 * 60 * 24)
+COUNTER_KEY = "stats:page-cache:{view}:{kind}"
+
+# view names wrapped by cache_public_page, in registration order (admin report)
+CACHED_VIEWS = []
+
+
+def _count(view_name, kind):
+    key = COUNTER_KEY.format(view=view_name, kind=kind)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def page_cache_stats():
+    """[(view, hits, misses, hit_ratio)] for every cached view."""
+    keys = [COUNTER_KEY.format(view=v, kind=k) for v in CACHED_VIEWS for k in ("hits", "misses")]
+    values = cache.get_many(keys)
+    rows = []
+    for view_name in CACHED_VIEWS:
+        hits = values.get(COUNTER_KEY.format(view=view_name, kind="hits"), 0)
+        misses = values.get(COUNTER_KEY.format(view=view_name, kind="misses"), 0)
+        ratio = round(100 * hits / (hits + misses), 1) if hits + misses else None
+        rows.append((view_name, hits, misses, ratio))
+    return rows
+
+
+def reset_page_cache_stats():
+    cache.delete_many([COUNTER_KEY.format(view=v, kind=k) for v in CACHED_VIEWS for k in ("hits", "misses")])
+
+
+def page_cache_key(request, params=()):
+    version, _ = get_data_version()
+    varying = "&".join(f"{p}={request.GET.get(p, '')}" for p in params)
+    digest = hashlib.md5(f"{request.path}?{varying}".encode(), usedforsecurity=False).hexdigest()
+    # the date is part of the key because the home page depends on it
+    return f"stats:page:{version}:{timezone.localdate():%Y%m%d}:{digest}"
+
+
+def _bypass(request):
+    # profiled requests (stats/profiling.py) always render
+    return request.method not in ("GET", "HEAD") or getattr(request, "_skip_page_cache", False)
+
+
+def _lookup(view_name, request, params):
+    """(key, cached response or None), counting the hit or miss."""
+    key = page_cache_key(request, params)
+    cached = cache.get(key)
+    _count(view_name, "hits" if cached is not None else "misses")
+    if cached is None:
+        return key, None
+    content, content_type = cached
+    return key, HttpResponse(content, content_type=content_type)
+
+
+def _store(key, response):
+    if response.status_code == 200 and not response.streaming:
+        cache.set(key, (response.content, response["Content-Type"]), PAGE_CACHE_TIMEOUT)
+
+
+def cache_public_page(*params):
+    """
+    Cache the rendered page per data version, path and the given GET params.
+    Only successful GET/HEAD responses are stored. Works for sync and async views.
+    """
+    def decorator(view):
+        CACHED_VIEWS.append(view.__name__)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if _bypass(request):
+                    return await view(request, *args, **kwargs)
+                key, response = await sync_to_async(_lookup)(view.__name__, request, params)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(_store)(key, response)
+                return response
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if _bypass(request):
+                return view(request, *args, **kwargs)
+            key, response = _lookup(view.__name__, request, params)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                _store(key, response)
+            return response
+
+        return wrapper
+    return decorator
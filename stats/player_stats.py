@@ -0,0 +1,84 @@
+"""
+Maintenance of the denormalized PlayerStats rows.
+
+The player pages read PlayerStats instead of aggregating the whole
+Appearance table on every request. Rows are refreshed per player from
+signals (see stats/signals.py) and can be rebuilt from scratch with
+``manage.py rebuild_player_stats``.
+"""
+from itertools import groupby
+
+
+def summarize_appearances(apps):
+    """
+    Summarize one player's appearances, given as (date, goals) pairs already
+    ordered by game date/jornada. Returns a dict with the PlayerStats fields.
+    """
+    games = goals = streak = best = 0
+    first = last = None
+    for day, scored in apps:
+        games += 1
+        goals += scored or 0
+        if first is None:
+            first = day
+        last = day
+        streak = streak + 1 if scored else 0
+        best = max(best, streak)
+
+    return {
+        "games_played": games,
+        "goals": goals,
+        "goals_per_match": round(goals / games, 2) if games else 0,
+        "first_appearance": first,
+        "last_appearance": last,
+        "scoring_streak": streak,
+        "best_scoring_streak": best,
+    }
+
+
+STAT_FIELDS = [
+    "games_played", "goals", "goals_per_match", "first_appearance",
+    "last_appearance", "scoring_streak", "best_scoring_streak", "updated_at",
+]
+
+
+def refresh_player_stats(player_ids=None):
+    """
+    Recompute PlayerStats for the given players (all players when None)
+    with a single Appearance query plus one bulk upsert.
+    """
+    from django.utils import timezone
+
+    from .models import Appearance, Player, PlayerStats
+
+    if player_ids is None:
+        player_ids = list(Player.objects.values_list("pk", flat=True))
+    else:
+        # Players deleted in the meantime (cascades) have nothing to refresh.
+        player_ids = list(Player.objects.filter(pk__in=set(player_ids)).values_list("pk", flat=True))
+    if not player_ids:
+        return 0
+
+    apps = (
+        Appearance.objects
+        .filter(player_id__in=player_ids)
+        .order_by("player_id", "game__date", "game__jornada")
+        .values_list("player_id", "game__date", "goals")
+    )
+    by_player = {
+        pid: [(day, goals) for _, day, goals in rows]
+        for pid, rows in groupby(apps.iterator(), key=lambda r: r[0])
+    }
+
+    now = timezone.now()
+    rows = [
+        PlayerStats(player_id=pid, updated_at=now, **summarize_appearances(by_player.get(pid, ())))
+        for pid in player_ids
+    ]
+    PlayerStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["player"],
+        update_fields=STAT_FIELDS,
+    )
+    return len(rows)
@@ -0,0 +1,145 @@
+"""
+On-demand profiling of any page for staff users.
+
+Adding ?_profile=1 to a URL (while logged in as staff) runs the request under
+cProfile and records every database query with its SQL, duration and the
+project frames that issued it. The report is written to STATS_PROFILE_DIR
+(a .txt summary plus the raw .prof for tools like snakeviz) and listed in
+the admin next to the view metrics. The page and HTTP caches are bypassed so
+the report shows the real work.
+"""
+import cProfile
+import io
+import pstats
+import re
+import time
+import traceback
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+PROFILE_PARAM = "_profile"
+STACK_DEPTH = 8
+
+
+def profile_dir():
+    return Path(getattr(settings, "STATS_PROFILE_DIR", settings.BASE_DIR / "profiles"))
+
+
+def list_profiles():
+    """[(name, size_kb, modified)] of the saved reports, newest first."""
+    folder = profile_dir()
+    if not folder.is_dir():
+        return []
+    reports = sorted(folder.glob("*.txt"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [
+        (p.name, round(p.stat().st_size / 1024, 1),
+         datetime.fromtimestamp(p.stat().st_mtime, tz=timezone.get_current_timezone()))
+        for p in reports
+    ]
+
+
+def profile_path(name):
+    """Path of a saved report/dump, or None when `name` is not one of ours."""
+    if not re.fullmatch(r"[\w.-]+\.(txt|prof)", name or ""):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
+
+
+class _QueryCapture:
+    """connection.execute_wrapper recording SQL, duration and the calling project frames."""
+
+    def __init__(self):
+        self.queries = []
+        self.base_dir = str(settings.BASE_DIR)
+
+    def _stack(self):
+        frames = [
+            f for f in traceback.extract_stack()[:-2]
+            if f.filename.startswith(self.base_dir) and "site-packages" not in f.filename
+        ]
+        return traceback.format_list(frames[-STACK_DEPTH:])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            self.queries.append((ms, sql, self._stack()))
+
+
+def _write_report(request, elapsed_ms, profiler, capture):
+    folder = profile_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    match = getattr(request, "resolver_match", None)
+    view = match.url_name if match and match.url_name else "request"
+    stem = f"{timezone.now():%Y%m%d-%H%M%S}-{view}-{time.perf_counter_ns() % 10**6:06d}"
+
+    out = io.StringIO()
+    db_ms = sum(q[0] for q in capture.queries)
+    out.write(f"{request.method} {request.get_full_path()}\n")
+    out.write(f"user: {request.user}  at: {timezone.now():%Y-%m-%d %H:%M:%S %Z}\n")
+    out.write(f"total: {elapsed_ms:.1f} ms  queries: {len(capture.queries)}  db: {db_ms:.1f} ms\n\n")
+
+    out.write("=" * 30 + " Queries " + "=" * 30 + "\n")
+    for i, (ms, sql, stack) in enumerate(capture.queries, start=1):
+        out.write(f"\n#{i}  {ms:.2f} ms\n{sql}\n")
+        out.write("".join(stack))
+
+    out.write("\n" + "=" * 30 + " cProfile (cumulative) " + "=" * 30 + "\n")
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(60)
+
+    (folder / f"{stem}.txt").write_text(out.getvalue())
+    profiler.dump_stats(folder / f"{stem}.prof")
+    return f"{stem}.txt"
+
+
+class ProfilingMiddleware:
+    """
+    Must come after AuthenticationMiddleware (it checks request.user.is_staff).
+    Sync-only on purpose: under ASGI Django runs it in the thread-sensitive
+    worker thread, where the views' sync_to_async() code and its database
+    connections live too, so the profiler and the query wrappers see them.
+    """
+
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _wanted(self, request):
+        if PROFILE_PARAM not in request.GET or not request.user.is_staff:
+            return False
+        # Skip 304s and the page cache: the point is to see the full render.
+        request.META.pop("HTTP_IF_NONE_MATCH", None)
+        request.META.pop("HTTP_IF_MODIFIED_SINCE", None)
+        request._skip_page_cache = True
+        return True
+
+    def __call__(self, request):
+        if not self._wanted(request):
+            return self.get_response(request)
+
+        capture = _QueryCapture()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(capture))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        response["X-Profile-Report"] = _write_report(request, elapsed_ms, profiler, capture)
+        return response
@@ -0,0 +1,71 @@
+"""
+Player and team name search.
+
+stats_search is an SQLite FTS5 table (migration 0012) kept in sync with
+stats_player and stats_team by triggers, so bulk inserts and queryset
+updates are covered too. Its unicode61 tokenizer folds case and accents
+("nunez" finds "Núñez"), and every word of a query is matched as a prefix,
+so "gar lu" finds "Luis García" while typing. Lookups are index seeks
+rather than the full scan of `icontains`.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = "stats_search"
+MAX_WORDS = 8
+CANDIDATES = 200
+RANKED_PREFIX = 3
+
+
+def _words(q):
+    return re.findall(r"\w+", q)[:MAX_WORDS]
+
+
+def match_expression(q):
+    """ 'Nuñez lu' -> '"Nuñez"* "lu"*', or "" when `q` has no words. """
+    # \w never matches a double quote, so the words need no escaping
+    return " ".join(f'"{word}"*' for word in _words(q))
+
+
+def matching_ids(kind, expression):
+    """pk__in= subquery of the "player" or "team" rows matching `expression`."""
+    return RawSQL(
+        f"SELECT rowid / 2 FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND kind = %s",
+        (expression, kind),
+    )
+
+
+def suggest(q, limit=8):
+    """
+    [(kind, pk, name), ...] for the type-ahead, in one query. When every
+    word has RANKED_PREFIX characters or more, all hits are ranked (bm25) and
+    the best come first. Shorter words match most of a large roster and
+    scoring all of it is the slow part, so only the first CANDIDATES hits (in
+    rowid order, i.e. roughly oldest first) are ranked: a good match outside
+    them can be missing until the user types more.
+    """
+    from .models import Player
+
+    words = _words(q)
+    if not words:
+        return []
+    expression = match_expression(q)
+    connection = connections[router.db_for_read(Player)]
+    with connection.cursor() as cursor:
+        if min(len(w) for w in words) >= RANKED_PREFIX:
+            cursor.execute(
+                f"SELECT kind, rowid / 2, name FROM {SEARCH_TABLE}"
+                f" WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+                [expression, limit],
+            )
+        else:
+            cursor.execute(
+                f"SELECT kind, id, name FROM ("
+                f"  SELECT kind, rowid / 2 AS id, name, rank FROM {SEARCH_TABLE}"
+                f"  WHERE {SEARCH_TABLE} MATCH %s LIMIT %s"
+                f") ORDER BY rank LIMIT %s",
+                [expression, CANDIDATES, limit],
+            )
+        return cursor.fetchall()
@@ -0,0 +1,303 @@
+"""
+Bulk season import.
+
+import_season() streams records from CSV or NDJSON files in the layout of
+the exports (stats/exports.py): partidos, apariciones and tablas, plus
+equipos (name) and jugadores (first_name, last_name, number[, active]).
+A record's kind comes from its "type" field, or else from the file name
+(tablas.csv, temporada-2025.partidos.ndjson, ...).
+
+Records are written in batches, one transaction each, with bulk_create
+upserts on the models' unique_together keys, so re-importing a file
+updates rows instead of duplicating them. Foreign keys (teams by name,
+players by name and number, games by jornada and opponent, tables by
+jornada and date) resolve through in-memory maps loaded once and extended
+as batches create rows. A bad record raises SeasonImportError with its
+file and line before its batch writes anything. Bulk writes send no
+signals: PlayerStats, the standings columns and the data version are
+refreshed once at the end, and the delta tables (stats/snapshots.py) next
+to the tables an import writes are stored in full first.
+"""
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+
+from .models import Appearance, LeagueTable, LeagueTableEntry, PescaraGame, Player, Team
+from .player_stats import refresh_player_stats
+from .snapshots import DELTA, ENTRY_FIELDS, make_full, next_table
+from .standings import refresh_standings
+from .versioning import bump_data_version
+
+KINDS = ("equipos", "jugadores", "partidos", "apariciones", "tablas")
+BATCH_SIZE = 2000
+SIGNED_FIELDS = ("points", "goal_difference")
+
+
+class SeasonImportError(ValueError):
+    pass
+
+
+# --------------------
+# Reading
+# --------------------
+
+def kind_from_name(path):
+    for part in reversed(Path(path).name.split(".")):
+        if part in KINDS:
+            return part
+    return None
+
+
+def read_records(path):
+    """Yield (kind, record, "file:line") from one CSV or NDJSON file, lazily."""
+    path = Path(path)
+    default = kind_from_name(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            # line numbers count the header as line 1
+            rows = ((n, row) for n, row in enumerate(csv.DictReader(f), start=2))
+        else:
+            rows = ((n, _json(line, f"{path.name}:{n}")) for n, line in enumerate(f, start=1) if line.strip())
+        for n, row in rows:
+            where = f"{path.name}:{n}"
+            if not isinstance(row, dict):
+                raise SeasonImportError(f"{where}: el registro no es un objeto JSON")
+            kind = row.pop("type", None) or default
+            if kind not in KINDS:
+                raise SeasonImportError(f"{where}: tipo de registro desconocido ({kind or 'sin tipo'})")
+            yield kind, row, where
+
+
+def _json(line, where):
+    try:
+        return json.loads(line)
+    except ValueError:
+        raise SeasonImportError(f"{where}: JSON inválido")
+
+
+def _int(row, key, where, default=None, signed=False):
+    # only points and goal_difference may be negative (PositiveIntegerField elsewhere)
+    value = row.get(key)
+    if value in (None, ""):
+        if default is None:
+            raise SeasonImportError(f"{where}: falta {key}")
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise SeasonImportError(f"{where}: {key} no es un número ({value!r})")
+    if number < 0 and not signed:
+        raise SeasonImportError(f"{where}: {key} no puede ser negativo ({number})")
+    return number
+
+
+def _date(row, key, where):
+    try:
+        day = parse_date(str(row.get(key) or ""))
+    except ValueError:
+        day = None
+    if not day:
+        raise SeasonImportError(f"{where}: fecha inválida en {key} ({row.get(key)!r})")
+    return day
+
+
+def _text(row, key, where):
+    value = str(row.get(key) or "").strip()
+    if not value:
+        raise SeasonImportError(f"{where}: falta {key}")
+    return value
+
+
+def _bool(value):
+    return str(value).strip().lower() not in ("0", "false", "no", "")
+
+
+# --------------------
+# Writing
+# --------------------
+
+class SeasonImporter:
+    def __init__(self):
+        self.teams = dict(Team.objects.values_list("name", "pk"))
+        self.players = {
+            (first, last, number): pk
+            for pk, first, last, number in Player.objects.values_list("pk", "first_name", "last_name", "number")
+        }
+        self.games = {(j, opp): pk for pk, j, opp in PescaraGame.objects.values_list("pk", "jornada", "opponent_id")}
+        self.tables = {(j, day): pk for pk, j, day in LeagueTable.objects.values_list("pk", "jornada", "date")}
+        self.counts = dict.fromkeys(KINDS, 0)
+
+    # -- name -> id maps --------------------------------------------------
+
+    def _ensure_teams(self, names):
+        missing = set(names) - self.teams.keys()
+        if missing:
+            Team.objects.bulk_create([Team(name=n) for n in missing], ignore_conflicts=True)
+            self.teams.update(Team.objects.filter(name__in=missing).values_list("name", "pk"))
+
+    def _ensure_players(self, keys, active=None):
+        # `active` (key -> bool) comes from jugadores records and is upserted;
+        # players only named by an appearance are created as active
+        active = active or {}
+        if active:
+            Player.objects.bulk_create(
+                [Player(first_name=f, last_name=l, number=n, active=a) for (f, l, n), a in active.items()],
+                update_conflicts=True, unique_fields=["first_name", "last_name", "number"], update_fields=["active"],
+            )
+        missing = set(keys) - self.players.keys() - active.keys()
+        Player.objects.bulk_create(
+            [Player(first_name=f, last_name=l, number=n) for f, l, n in missing], ignore_conflicts=True,
+        )
+        new = (set(keys) | active.keys()) - self.players.keys()
+        if new:
+            for pk, first, last, number in Player.objects.filter(
+                last_name__in={k[1] for k in new}, number__in={k[2] for k in new},
+            ).values_list("pk", "first_name", "last_name", "number"):
+                self.players[(first, last, number)] = pk
+
+    def _refresh_games(self, keys):
+        new = set(keys) - self.games.keys()
+        if new:
+            for pk, j, opp in PescaraGame.objects.filter(
+                jornada__in={k[0] for k in new}, opponent_id__in={k[1] for k in new},
+            ).values_list("pk", "jornada", "opponent_id"):
+                self.games[(j, opp)] = pk
+
+    def _load_tables(self, keys):
+        for pk, j, day in LeagueTable.objects.filter(
+            jornada__in={k[0] for k in keys}, date__in={k[1] for k in keys},
+        ).values_list("pk", "jornada", "date"):
+            self.tables[(j, day)] = pk
+
+    def _ensure_tables(self, keys):
+        keys = set(keys)
+        new = keys - self.tables.keys()
+        if new:
+            self._load_tables(new)
+            new -= self.tables.keys()
+        # bulk writes skip the LeagueTable receivers that keep the delta chain
+        chained = keys and LeagueTable.objects.filter(storage=DELTA).exists()
+        if chained:
+            # a delta table right after a new one would carry the new entries
+            for j, day in new:
+                make_full(next_table(day, j))
+        if new:
+            LeagueTable.objects.bulk_create([LeagueTable(jornada=j, date=day) for j, day in new])
+            self._load_tables(new)
+        if chained:
+            # upserts: the tables written to, and the ones right after them,
+            # are stored in full so every other table resolves the same
+            for table in LeagueTable.objects.filter(pk__in={self.tables[k] for k in keys - new}):
+                make_full(table)
+                make_full(next_table(table.date, table.jornada))
+
+    # -- one batch --------------------------------------------------------
+
+    @transaction.atomic
+    def write_batch(self, batch):
+        by_kind = {kind: [] for kind in KINDS}
+        for kind, row, where in batch:
+            by_kind[kind].append((row, where))
+
+        # parse everything first: a bad record aborts the batch before any write
+        games, appearances, entries, active = [], [], [], {}
+        team_names = {_text(row, "name", where) for row, where in by_kind["equipos"]}
+        for row, where in by_kind["jugadores"]:
+            key = (_text(row, "first_name", where), _text(row, "last_name", where), _int(row, "number", where))
+            active[key] = _bool(row.get("active", "1"))
+        for row, where in by_kind["partidos"]:
+            gf, ga = _int(row, "goals_for", where, 0), _int(row, "goals_against", where, 0)
+            result = row.get("result") or ("W" if gf > ga else "D" if gf == ga else "L")
+            if result not in ("W", "D", "L"):
+                raise SeasonImportError(f"{where}: resultado inválido ({result!r})")
+            games.append((_int(row, "jornada", where), _date(row, "date", where),
+                          _text(row, "opponent", where), gf, ga, result))
+        for row, where in by_kind["apariciones"]:
+            player = (_text(row, "first_name", where), _text(row, "last_name", where), _int(row, "number", where))
+            appearances.append((_int(row, "jornada", where), _text(row, "opponent", where), player,
+                                _int(row, "goals", where, 0), where))
+        for row, where in by_kind["tablas"]:
+            entries.append((_int(row, "jornada", where), _date(row, "date", where), _text(row, "team", where),
+                            {f: _int(row, f, where, 0, signed=f in SIGNED_FIELDS)
+                             for f in ENTRY_FIELDS if f != "position"}
+                            | {"position": _int(row, "position", where)}))
+
+        team_names |= {g[2] for g in games} | {a[1] for a in appearances} | {e[2] for e in entries}
+        self._ensure_teams(team_names)
+        self._ensure_players({a[2] for a in appearances}, active)
+
+        if games:
+            PescaraGame.objects.bulk_create(
+                [PescaraGame(jornada=j, date=day, opponent_id=self.teams[opp], goals_for=gf, goals_against=ga,
+                             result=result)
+                 for j, day, opp, gf, ga, result in games],
+                update_conflicts=True, unique_fields=["jornada", "opponent"],
+                update_fields=["date", "goals_for", "goals_against", "result"],
+            )
+        self._refresh_games(
+            {(g[0], self.teams[g[2]]) for g in games} | {(a[0], self.teams[a[1]]) for a in appearances}
+        )
+
+        rows = []
+        for j, opp, player, goals, where in appearances:
+            game = self.games.get((j, self.teams[opp]))
+            if game is None:
+                raise SeasonImportError(f"{where}: no existe el partido J{j} vs {opp}")
+            rows.append(Appearance(game_id=game, player_id=self.players[player], goals=goals))
+        if rows:
+            Appearance.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=["game", "player"], update_fields=["goals"],
+            )
+
+        self._ensure_tables((e[0], e[1]) for e in entries)
+        if entries:
+            LeagueTableEntry.objects.bulk_create(
+                [LeagueTableEntry(table_id=self.tables[(j, day)], team_id=self.teams[team], **values)
+                 for j, day, team, values in entries],
+                update_conflicts=True, unique_fields=["table", "team"], update_fields=list(ENTRY_FIELDS),
+            )
+
+        for kind in KINDS:
+            self.counts[kind] += len(by_kind[kind])
+
+
+def import_season(paths, batch_size=BATCH_SIZE, progress=None):
+    """
+    Import the records of `paths` in batches of `batch_size`. `progress` is
+    called after every batch with (records so far, seconds so far). Returns
+    the number of records per kind.
+    """
+    importer = SeasonImporter()
+    started = time.perf_counter()
+    done = 0
+    batch = []
+
+    def flush():
+        nonlocal done, batch
+        try:
+            importer.write_batch(batch)
+        except IntegrityError as exc:
+            # anything the parsers let through and the database refuses
+            raise SeasonImportError(f"lote {batch[0][2]} – {batch[-1][2]}: {exc}")
+        done += len(batch)
+        batch = []
+        if progress:
+            progress(done, time.perf_counter() - started)
+
+    for path in paths:
+        for record in read_records(path):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+
+    with transaction.atomic():
+        refresh_player_stats()
+        refresh_standings()
+        bump_data_version()
+    return importer.counts
@@ -0,0 +1,210 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    Appearance, LeagueTable, LeagueTableEntry, PescaraGame, Player, SiteSettings, Team,
+)
+from .player_stats import refresh_player_stats
+from .site import invalidate_site_info
+from .snapshots import DELTA, FULL, carried_entries, make_full, next_table, store_full
+from .standings import refresh_standings, table_and_next, tables_from
+from .thumbnails import refresh_thumbnails
+from .versioning import bump_data_version
+
+
+# --------------------
+# Batched changes
+# --------------------
+# A form with an inline saves one row at a time; inside batched_changes()
+# the receivers below only take note, and the standings refresh and version
+# bump (which schedules the dashboard rebuild) run once when the block ends.
+
+_batch = contextvars.ContextVar("stats_signal_batch", default=None)
+
+
+@contextmanager
+def batched_changes():
+    """Run the per-row derived-data upkeep once for every save in the block."""
+    if _batch.get() is not None:  # nested: the outer block flushes
+        yield
+        return
+    batch = {"tables": set(), "entry_tables": set(), "version": False}
+    token = _batch.set(batch)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    tables = set(batch["tables"])
+    for table_id in batch["entry_tables"]:
+        tables.update(table_and_next(table_id))
+    if tables:
+        refresh_standings(tables)
+    if batch["version"]:
+        bump_data_version()
+
+
+# --------------------
+# PlayerStats upkeep
+# --------------------
+
+@receiver(pre_save, sender=Appearance)
+def _remember_previous_player(sender, instance, raw=False, **kwargs):
+    # An appearance moved to another player must refresh both players.
+    instance._previous_player_id = None
+    if instance.pk and not raw:
+        instance._previous_player_id = (
+            Appearance.objects.filter(pk=instance.pk).values_list("player_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Appearance)
+@receiver(post_delete, sender=Appearance)
+def _appearance_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ids = {instance.player_id, getattr(instance, "_previous_player_id", None)}
+    refresh_player_stats(i for i in ids if i)
+
+
+@receiver(post_save, sender=PescaraGame)
+def _game_saved(sender, instance, created, raw=False, **kwargs):
+    # A new game has no appearances yet; an edited one may have a new date,
+    # which moves first/last appearance and the scoring streaks.
+    if raw or created:
+        return
+    refresh_player_stats(instance.appearances.values_list("player_id", flat=True))
+
+
+@receiver(post_save, sender=Player)
+def _player_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        refresh_player_stats([instance.pk])
+
+
+# --------------------
+# Delta table chain
+# --------------------
+# Connected before the standings receivers, which read the chain.
+
+@receiver(pre_save, sender=LeagueTable)
+def _keep_chain_on_move(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = sender.objects.filter(pk=instance.pk).first() if instance.pk else None
+    if old and (old.date, old.jornada) == (instance.date, instance.jornada):
+        return
+    if old:
+        # leaving its place: neither the table after it nor the table itself
+        # may depend on the tables around the old position any more
+        make_full(next_table(old.date, old.jornada, exclude=old.pk))
+        if old.storage == DELTA:
+            make_full(old)
+            instance.storage = FULL
+    # taking a new place (or a first one) in front of a delta table
+    make_full(next_table(instance.date, instance.jornada, exclude=instance.pk))
+
+
+@receiver(pre_delete, sender=LeagueTable)
+def _remember_next_table(sender, instance, **kwargs):
+    # Resolved now, while the chain is whole: a queryset delete sends every
+    # pre_delete before deleting anything, and the next table may go too.
+    following = next_table(instance.date, instance.jornada, exclude=instance.pk)
+    instance._next_table = (following, carried_entries(following))
+
+
+@receiver(post_delete, sender=LeagueTable)
+def _keep_chain_on_delete(sender, instance, **kwargs):
+    following, carried = getattr(instance, "_next_table", (None, []))
+    if following and following.storage == DELTA and sender.objects.filter(pk=following.pk).exists():
+        store_full(following, carried)
+
+
+# --------------------
+# Derived standings columns
+# --------------------
+
+@receiver(pre_save, sender=PescaraGame)
+@receiver(pre_save, sender=LeagueTable)
+def _remember_previous_date(sender, instance, raw=False, **kwargs):
+    # Moving a game or table in time affects the tables from the earlier date.
+    instance._previous_date = None
+    if instance.pk and not raw:
+        instance._previous_date = sender.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+
+
+@receiver(post_save, sender=PescaraGame)
+@receiver(post_save, sender=LeagueTable)
+@receiver(post_delete, sender=PescaraGame)
+@receiver(post_delete, sender=LeagueTable)
+def _dated_row_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    day = min(d for d in (instance.date, getattr(instance, "_previous_date", None)) if d)
+    batch = _batch.get()
+    if batch is not None:
+        batch["tables"].update(tables_from(day))
+    else:
+        refresh_standings(tables_from(day))
+
+
+@receiver(post_save, sender=LeagueTableEntry)
+@receiver(post_delete, sender=LeagueTableEntry)
+def _entry_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    batch = _batch.get()
+    if batch is not None:
+        batch["entry_tables"].add(instance.table_id)
+    else:
+        refresh_standings(table_and_next(instance.table_id))
+
+
+# --------------------
+# Image thumbnails
+# --------------------
+# Connected before the version receivers, so the bump that follows a new
+# upload already finds its variants recorded.
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Player)
+def _image_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_thumbnails(instance)
+
+
+# --------------------
+# Cached site resolution
+# --------------------
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def _site_changed(sender, **kwargs):
+    # The cached SiteInfo holds the home club instance too (name, logo).
+    invalidate_site_info()
+
+
+# --------------------
+# Global data version
+# --------------------
+
+VERSIONED_MODELS = (Team, Player, PescaraGame, Appearance, LeagueTable, LeagueTableEntry, SiteSettings)
+
+
+def _data_changed(sender, raw=False, **kwargs):
+    if raw:
+        return
+    batch = _batch.get()
+    if batch is not None:
+        batch["version"] = True
+    else:
+        bump_data_version()
+
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(_data_changed, sender=_model, dispatch_uid=f"stats-version-save-{_model.__name__}")
+    post_delete.connect(_data_changed, sender=_model, dispatch_uid=f"stats-version-delete-{_model.__name__}")
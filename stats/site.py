@@ -0,0 +1,77 @@
+"""
+Resolution of the active SiteSettings and the home club.
+
+The result is kept in Django's cache (shared between processes when a
+shared backend is configured, see CACHES in settings) and memoized on the
+request, so a warm page issues no settings queries at all. The cache entry
+is dropped from stats/signals.py whenever a SiteSettings or Team changes.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+SITE_CACHE_KEY = "stats:site-info"
+SITE_CACHE_TIMEOUT = getattr(settings, "STATS_SITE_CACHE_TIMEOUT", 60 * 60)
+DEFAULT_TOTAL_ROUNDS = 25
+
+SiteInfo = namedtuple("SiteInfo", ["site", "home_team", "total_rounds"])
+
+_MISSING = object()
+
+
+def _load_site_info():
+    from .models import SiteSettings, Team
+
+    site = (
+        SiteSettings.objects
+        .select_related("home_club")
+        .filter(is_active=True)
+        .first()
+    )
+    if site and site.home_club_id:
+        home_team = site.home_club
+    else:
+        # legacy/fallback – keep names so nothing breaks
+        home_team = (Team.objects.filter(name__icontains="pescara").first()
+                     or Team.objects.first())
+
+    total_rounds = DEFAULT_TOTAL_ROUNDS
+    if site and getattr(site, "max_rounds", None):
+        try:
+            val = int(site.max_rounds)
+            if val > 0:
+                total_rounds = val
+        except (TypeError, ValueError):
+            pass
+
+    return SiteInfo(site, home_team, total_rounds)
+
+
+def get_site_info(request=None):
+    """
+    Return SiteInfo(site, home_team, total_rounds) for the active SiteSettings.
+    `site` is None when no active SiteSettings exists and `home_team` falls
+    back to a team named like "Pescara" (or the first team).
+    """
+    if request is not None:
+        info = getattr(request, "_stats_site_info", None)
+        if info is not None:
+            return info
+
+    info = cache.get(SITE_CACHE_KEY, _MISSING)
+    if info is _MISSING:
+        info = _load_site_info()
+        cache.set(SITE_CACHE_KEY, info, SITE_CACHE_TIMEOUT)
+
+    if request is not None:
+        request._stats_site_info = info
+    return info
+
+
+def invalidate_site_info():
+    cache.delete(SITE_CACHE_KEY)
+    # A request may re-cache the old settings before the write commits; drop
+    # them again once the change is visible.
+    transaction.on_commit(lambda: cache.delete(SITE_CACHE_KEY))
@@ -0,0 +1,251 @@
+"""
+Full and delta-encoded LeagueTable snapshots.
+
+A "full" table stores one entry per team. A "delta" table only stores the
+entries that changed since the previous table (by date, jornada); every
+other team carries over unchanged. New tables use the STATS_TABLE_STORAGE
+mode ("full" by default), and ``manage.py compact_league_tables`` converts
+existing history either way.
+
+Readers never see the difference: resolve_table() rebuilds one complete
+table (cached per table and data version) and resolved_rows() walks the
+whole history in one query for the derived views (positions index,
+position matrix, trajectory, standings deltas).
+"""
+import copy
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .versioning import get_data_version
+
+FULL, DELTA = "full", "delta"
+ENTRY_FIELDS = ("position", "played", "wins", "draws", "losses", "points", "goal_difference")
+
+RESOLVED_TABLE_KEY = "stats:resolved-table:{version}:{pk}"
+RESOLVED_TABLE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def storage_mode():
+    """Storage of the tables created from the admin."""
+    return getattr(settings, "STATS_TABLE_STORAGE", FULL)
+
+
+def resolved_rows(fields=("position",), until=None):
+    """
+    Yield (table_pk, date, jornada, {team_id: (field values...)}) for every
+    table in (date, jornada) order (up to `until` when given), with delta
+    tables filled in from their predecessors. One query (tables LEFT JOIN
+    entries).
+    """
+    from .models import LeagueTable
+
+    rows = LeagueTable.objects.order_by("date", "jornada", "pk")
+    if until:
+        rows = rows.filter(date__lte=until)
+    rows = rows.values_list(
+        "pk", "date", "jornada", "storage", "entries__team", *(f"entries__{f}" for f in fields),
+    )
+
+    state = {}
+    for (pk, day, jornada, storage), group in groupby(rows.iterator(), key=lambda r: r[:4]):
+        state = dict(state) if storage == DELTA else {}
+        for _, _, _, _, team_id, *values in group:
+            if team_id is not None:  # a table without entries
+                state[team_id] = tuple(values)
+        yield pk, day, jornada, state
+
+
+def _resolve(table):
+    from .models import LeagueTable, LeagueTableEntry
+
+    if table.storage == FULL:
+        entries = list(table.entries.select_related("team").order_by("position"))
+        for e in entries:
+            e.table = table
+        return entries
+
+    # the chain from the last full table up to this one
+    not_after = Q(date__lt=table.date) | Q(date=table.date, jornada__lte=table.jornada)
+    base = (
+        LeagueTable.objects.filter(not_after, storage=FULL)
+        .order_by("-date", "-jornada").values_list("date", "jornada").first()
+    )
+    chain = LeagueTable.objects.filter(not_after)
+    if base:
+        chain = chain.filter(Q(date__gt=base[0]) | Q(date=base[0], jornada__gte=base[1]))
+    rows = (
+        LeagueTableEntry.objects
+        .filter(table__in=chain)
+        .select_related("team")
+        .order_by("table__date", "table__jornada")
+    )
+
+    state = {}
+    for e in rows:
+        state[e.team_id] = e
+    entries = []
+    for team_id, e in state.items():
+        if e.table_id != table.pk:
+            # carried over unchanged from an earlier table
+            e = copy.copy(e)
+            e.pk = None
+            e._state.adding = True
+            e.pos_delta = 0
+        e.table = table
+        entries.append(e)
+    entries.sort(key=lambda e: (e.position, e.team.name))
+    return entries
+
+
+def resolve_table(table):
+    """Every entry of `table` (LeagueTableEntry instances with their team), by position."""
+    version, _ = get_data_version()
+    key = RESOLVED_TABLE_KEY.format(version=version, pk=table.pk)
+    entries = cache.get(key)
+    if entries is None:
+        entries = _resolve(table)
+        cache.set(key, entries, RESOLVED_TABLE_TIMEOUT)
+    return entries
+
+
+# --------------------
+# Writing snapshots
+# --------------------
+
+def _entry_columns():
+    from .models import LeagueTableEntry
+
+    return [
+        f.column for f in LeagueTableEntry._meta.concrete_fields
+        if not f.primary_key and f.name != "table"
+    ]
+
+
+def clone_entries(source, target):
+    """
+    Copy every entry of `source` (all fields) into the empty table `target`
+    and return the number of rows. A full source is copied with a single
+    INSERT ... SELECT; a delta source is resolved first.
+    """
+    from .models import LeagueTableEntry
+
+    if source.storage == DELTA:
+        rows = [copy.copy(e) for e in resolve_table(source)]
+        for e in rows:
+            e.pk, e.table = None, target
+        return len(LeagueTableEntry.objects.bulk_create(rows))
+
+    qn = connection.ops.quote_name
+    db_table = qn(LeagueTableEntry._meta.db_table)
+    table_col = qn(LeagueTableEntry._meta.get_field("table").column)
+    columns = ", ".join(qn(c) for c in _entry_columns())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {db_table} ({table_col}, {columns}) "
+            f"SELECT %s, {columns} FROM {db_table} WHERE {table_col} = %s",
+            [target.pk, source.pk],
+        )
+        return cursor.rowcount
+
+
+def _raw_delete_entries(pks):
+    # plain SQL: a queryset delete would send one signal (and one standings
+    # refresh) per row; callers refresh once at the end
+    from .models import LeagueTableEntry
+
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for i in range(0, len(pks), 500):
+            chunk = pks[i:i + 500]
+            cursor.execute(
+                f"DELETE FROM {qn(LeagueTableEntry._meta.db_table)} "
+                f"WHERE {qn(LeagueTableEntry._meta.pk.column)} IN ({', '.join(['%s'] * len(chunk))})",
+                chunk,
+            )
+
+
+# --------------------
+# Keeping the chain intact
+# --------------------
+# A delta table resolves against the tables before it, so taking a table
+# out of its place (deleting it, moving it to another date or jornada) or
+# putting one in front of a delta table would change what the later table
+# shows. The signals in stats/signals.py make that table full first.
+
+def next_table(day, jornada, exclude=None):
+    """The table right after (day, jornada), or None."""
+    from .models import LeagueTable
+
+    tables = LeagueTable.objects.filter(Q(date__gt=day) | Q(date=day, jornada__gt=jornada))
+    if exclude is not None:
+        tables = tables.exclude(pk=exclude)
+    return tables.order_by("date", "jornada", "pk").first()
+
+
+def carried_entries(table):
+    """Unsaved copies of the entries a delta `table` takes from earlier tables."""
+    if table is None or table.storage == FULL:
+        return []
+    return [e for e in _resolve(table) if e.pk is None]
+
+
+def store_full(table, carried):
+    """Save `carried` (from carried_entries) into `table` and switch it to full storage."""
+    from .models import LeagueTable, LeagueTableEntry
+
+    LeagueTableEntry.objects.bulk_create(carried)
+    LeagueTable.objects.filter(pk=table.pk).update(storage=FULL)
+    table.storage = FULL
+
+
+def make_full(table):
+    """Switch `table` to full storage; it resolves to the same entries."""
+    if table is not None and table.storage == DELTA:
+        store_full(table, carried_entries(table))
+
+
+@transaction.atomic
+def encode_deltas():
+    """
+    Convert every full table that can be (not the first one, and keeping all
+    the teams of the table before it) to delta storage, deleting the entries
+    equal to the previous table. Returns (tables converted, entries removed).
+    """
+    from .models import LeagueTable
+
+    storage = dict(LeagueTable.objects.values_list("pk", "storage"))
+    converted, redundant = [], []
+    previous = None
+    # values are (entry pk, *ENTRY_FIELDS)
+    for pk, _, _, state in resolved_rows(fields=("pk",) + ENTRY_FIELDS):
+        if storage[pk] == FULL and previous is not None and previous.keys() <= state.keys():
+            converted.append(pk)
+            redundant += [
+                values[0] for team_id, values in state.items()
+                if team_id in previous and previous[team_id][1:] == values[1:]
+            ]
+        previous = state
+
+    _raw_delete_entries(redundant)
+    LeagueTable.objects.filter(pk__in=converted).update(storage=DELTA)
+    return len(converted), len(redundant)
+
+
+@transaction.atomic
+def expand_deltas():
+    """Store every delta table in full again. Returns (tables, entries added)."""
+    from .models import LeagueTable, LeagueTableEntry
+
+    tables = list(LeagueTable.objects.filter(storage=DELTA).order_by("date", "jornada"))
+    added = []
+    for table in tables:
+        for e in _resolve(table):
+            if e.pk is None:
+                added.append(e)
+    LeagueTableEntry.objects.bulk_create(added, batch_size=500)
+    LeagueTable.objects.filter(pk__in=[t.pk for t in tables]).update(storage=FULL)
+    return len(tables), len(added)
@@ -0,0 +1,99 @@
+"""
+Maintenance of the derived LeagueTableEntry columns.
+
+Each entry stores its movement since the previous table (pos_delta) and the
+result of the last game against that team on or before the table's date
+(last_result_vs_home), so the standings page reads a single table's entries
+and nothing else. They are recomputed from signals when tables, entries or
+games change (see stats/signals.py) and after admin clones and bulk loads.
+Entries a delta table carries over (stats/snapshots.py) have not moved: the
+resolver gives them a pos_delta of 0.
+"""
+from bisect import bisect_right
+
+from django.db.models import Q
+
+from .snapshots import resolved_rows
+
+DERIVED_FIELDS = ["pos_delta", "last_result_vs_home"]
+
+
+def refresh_standings(table_ids=None):
+    """
+    Recompute the derived columns of the given tables (all tables when None)
+    and return the number of entries changed.
+    """
+    from .models import LeagueTable, LeagueTableEntry, PescaraGame
+
+    order = list(LeagueTable.objects.order_by("date", "jornada").values_list("pk", "date"))
+    previous = {pk: order[i - 1][0] if i else None for i, (pk, _) in enumerate(order)}
+    dates = dict(order)
+    targets = set(dates) if table_ids is None else set(table_ids) & set(dates)
+    if not targets:
+        return 0
+
+    # resolved, so a delta table's carried teams count as present
+    wanted = {previous[pk] for pk in targets if previous[pk]}
+    positions = {
+        table_id: {team_id: pos for team_id, (pos,) in state.items()}
+        for table_id, _, _, state in resolved_rows(
+            until=max((dates[pk] for pk in wanted), default=None),
+        )
+        if table_id in wanted
+    } if wanted else {}
+
+    # per opponent, (date, jornada)-ordered games up to the latest target table
+    games = {}
+    for opp_id, day, result in (
+        PescaraGame.objects
+        .filter(date__lte=max(dates[pk] for pk in targets))
+        .order_by("date", "jornada")
+        .values_list("opponent_id", "date", "result")
+    ):
+        days, results = games.setdefault(opp_id, ([], []))
+        days.append(day)
+        results.append(result)
+
+    def last_result(team_id, day):
+        days, results = games.get(team_id, ((), ()))
+        i = bisect_right(days, day)
+        return results[i - 1] if i else ""
+
+    changed = []
+    for entry in LeagueTableEntry.objects.filter(table_id__in=targets).only(
+        "pk", "table_id", "team_id", "position", *DERIVED_FIELDS
+    ):
+        prev_pos = positions.get(previous[entry.table_id], {}).get(entry.team_id)
+        delta = prev_pos - entry.position if prev_pos is not None else None
+        result = last_result(entry.team_id, dates[entry.table_id])
+        if (entry.pos_delta, entry.last_result_vs_home) != (delta, result):
+            entry.pos_delta, entry.last_result_vs_home = delta, result
+            changed.append(entry)
+
+    LeagueTableEntry.objects.bulk_update(changed, DERIVED_FIELDS, batch_size=500)
+    return len(changed)
+
+
+def tables_from(day):
+    """Ids of the tables dated on or after `day` (their head-to-heads can change)."""
+    from .models import LeagueTable
+
+    return list(LeagueTable.objects.filter(date__gte=day).values_list("pk", flat=True))
+
+
+def table_and_next(table_id):
+    """The table itself plus the one after it, whose deltas are relative to it."""
+    from .models import LeagueTable
+
+    table = LeagueTable.objects.filter(pk=table_id).values_list("date", "jornada").first()
+    if table is None:
+        return []
+    day, jornada = table
+    following = (
+        LeagueTable.objects
+        .filter(Q(date__gt=day) | Q(date=day, jornada__gt=jornada))
+        .order_by("date", "jornada")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    return [table_id] + ([following] if following else [])
@@ -0,0 +1,77 @@
+"""
+Static files build.
+
+PrecompressedManifestStaticFilesStorage is Django's manifest storage (every
+file gets a content hash in its name, so it can be cached for a year as
+immutable) plus two steps in `collectstatic`: the stylesheets are minified
+before they are hashed, and every hashed text asset gets `.gz` (and `.br`
+when the optional `brotli` package is installed) siblings for servers that
+serve precompressed files (nginx gzip_static/brotli_static and the like).
+"""
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants without it
+    brotli = None
+
+# strings are kept as is, comments dropped, whitespace runs collapsed
+_CSS_TOKEN = re.compile(r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|/\*.*?\*/|\s+""", re.S)
+_CSS_STRING = re.compile(r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')""")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(css):
+    """Drop comments and the whitespace CSS doesn't need (outside strings)."""
+    css = _CSS_TOKEN.sub(lambda m: m.group(1) or " ", css)
+    parts = _CSS_STRING.split(css)
+    # odd parts are the strings captured by split()
+    for i in range(0, len(parts), 2):
+        parts[i] = _CSS_PUNCT.sub(r"\1", parts[i]).replace(";}", "}")
+    return "".join(parts).strip()
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    compress_extensions = (".css", ".js", ".svg", ".json", ".txt", ".map", ".ico")
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in paths:
+                if name.endswith(".css") and not name.endswith(".min.css"):
+                    self._minify(name)
+                    # hash (and rewrite the urls of) the minified copy, not the source
+                    paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                if name.endswith(self.compress_extensions):
+                    self._compress(name)
+
+    def _minify(self, name):
+        path = self.path(name)
+        with open(path, encoding="utf-8") as f:
+            css = f.read()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(minify_css(css))
+
+    def _compress(self, name):
+        path = self.path(name)
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < self.min_compress_size:
+            return
+        variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            # only worth serving when smaller
+            if len(compressed) < len(data):
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
@@ -0,0 +1,135 @@
+"""
+Synthetic league data for benchmarks and load tests.
+
+generate_league() writes teams, a squad, the home club's games with
+appearances and a full LeagueTable snapshot per jornada, all with bulk
+inserts. Since bulk inserts send no signals, PlayerStats, the standings
+columns and the data version are refreshed once at the end.
+"""
+import random
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from .models import (
+    Team, Player, PescaraGame, Appearance, LeagueTable, LeagueTableEntry, SiteSettings,
+)
+from .player_stats import refresh_player_stats
+from .standings import refresh_standings
+from .versioning import bump_data_version
+
+FIRST_NAMES = ["Luis", "Carlos", "Jorge", "Andrés", "Diego", "Raúl", "Iván", "Óscar",
+               "Hugo", "Mario", "Pablo", "Sergio", "Tomás", "Emilio", "Ramón", "Íñigo"]
+LAST_NAMES = ["García", "Núñez", "Pérez", "López", "Martínez", "Hernández", "Ramírez",
+              "Sánchez", "Gómez", "Díaz", "Castillo", "Ortega", "Muñoz", "Vázquez"]
+
+
+def _simulate(rng, teams, rows, pairings):
+    """Play one jornada: every pairing gets a score, `rows` accumulates the table."""
+    scores = {}
+    for a, b in pairings:
+        ga, gb = rng.randint(0, 8), rng.randint(0, 8)
+        scores[a], scores[b] = (ga, gb), (gb, ga)
+    for team in teams:
+        if team.pk not in scores:
+            continue  # bye
+        gf, ga = scores[team.pk]
+        r = rows[team.pk]
+        r["played"] += 1
+        r["goal_difference"] += gf - ga
+        if gf > ga:
+            r["wins"] += 1
+            r["points"] += 3
+        elif gf == ga:
+            r["draws"] += 1
+            r["points"] += 1
+        else:
+            r["losses"] += 1
+    return scores
+
+
+@transaction.atomic
+def generate_league(seasons=1, rounds=None, teams=None, squad=30, seed=None,
+                    start=date(2020, 8, 1), prefix="Sintético"):
+    """
+    Create `seasons` seasons of `rounds` jornadas (default: SiteSettings.max_rounds)
+    for a league of `teams` clubs (default: random 20–25) including the home club.
+    Returns a dict with the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    site = SiteSettings.objects.select_related("home_club").filter(is_active=True).first()
+    rounds = rounds or (site.max_rounds if site else 25)
+    n_teams = teams or rng.randint(20, 25)
+    if seasons > n_teams - 1:
+        # (jornada, opponent) is unique, so each season must rotate to new opponents
+        raise ValueError(f"At most {n_teams - 1} seasons fit in a {n_teams}-team league.")
+
+    if site:
+        home = site.home_club
+    else:
+        home, _ = Team.objects.get_or_create(name="Pescara")
+        site = SiteSettings.objects.create(site_name=home.name, home_club=home, max_rounds=rounds)
+
+    existing = set(Team.objects.filter(name__startswith=prefix).values_list("name", flat=True))
+    Team.objects.bulk_create(
+        Team(name=f"{prefix} {i:02d}") for i in range(1, n_teams) if f"{prefix} {i:02d}" not in existing
+    )
+    opponents = list(Team.objects.filter(name__in=[f"{prefix} {i:02d}" for i in range(1, n_teams)]))
+    league = [home] + opponents
+
+    number_base = (Player.objects.order_by("-number").values_list("number", flat=True).first() or 0) + 1
+    Player.objects.bulk_create(
+        Player(first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES), number=number_base + i)
+        for i in range(squad)
+    )
+    players = list(Player.objects.filter(number__gte=number_base))
+
+    first_jornada = (PescaraGame.objects.order_by("-jornada").values_list("jornada", flat=True).first() or 0) + 1
+    games, lineups, tables, rankings = [], [], [], []
+    day = start
+    for season in range(seasons):
+        rows = {t.pk: dict(played=0, wins=0, draws=0, losses=0, points=0, goal_difference=0) for t in league}
+        for j in range(first_jornada, first_jornada + rounds):
+            day += timedelta(days=7)
+            order = league[1:]
+            rng.shuffle(order)
+            # home club vs a rotating opponent; everybody else paired at random
+            rival = opponents[(j - 1 + season) % len(opponents)]
+            order.remove(rival)
+            pairings = [(home.pk, rival.pk)] + [
+                (order[i].pk, order[i + 1].pk) for i in range(0, len(order) - 1, 2)
+            ]
+            scores = _simulate(rng, league, rows, pairings)
+
+            gf, ga = scores[home.pk]
+            games.append(PescaraGame(
+                jornada=j, date=day, opponent=rival, goals_for=gf, goals_against=ga,
+                result="W" if gf > ga else "D" if gf == ga else "L",
+            ))
+            lineup = rng.sample(players, min(len(players), rng.randint(11, 16)))
+            goals = {p.pk: 0 for p in lineup}
+            for _ in range(gf):
+                goals[rng.choice(lineup).pk] += 1
+            lineups.append([(p, goals[p.pk]) for p in lineup])
+
+            tables.append(LeagueTable(jornada=j, date=day + timedelta(days=1)))
+            ranking = sorted(league, key=lambda t: (-rows[t.pk]["points"], -rows[t.pk]["goal_difference"], t.name))
+            rankings.append([(t, dict(rows[t.pk])) for t in ranking])
+        day += timedelta(weeks=4)  # break between seasons
+
+    # bulk_create sets the pks (RETURNING), so the children can follow
+    PescaraGame.objects.bulk_create(games)
+    Appearance.objects.bulk_create(
+        Appearance(game=game, player=p, goals=scored) for game, lineup in zip(games, lineups) for p, scored in lineup
+    )
+    LeagueTable.objects.bulk_create(tables)
+    LeagueTableEntry.objects.bulk_create(
+        LeagueTableEntry(table=table, team=t, position=pos, **values)
+        for table, ranking in zip(tables, rankings) for pos, (t, values) in enumerate(ranking, start=1)
+    )
+
+    refresh_player_stats()
+    refresh_standings()
+    bump_data_version()
+    return {"teams": len(league), "players": len(players), "games": len(games),
+            "appearances": sum(map(len, lineups)), "tables": len(tables), "entries": sum(map(len, rankings))}
@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail(thumbs, size="sm", **attrs):
+    """
+    {% thumbnail team.logo_thumbs "sm" class="badge-lg" alt=team.name %}
+    renders the resized image (WebP with a PNG fallback), or nothing
+    when there is no image.
+    """
+    if not thumbs:
+        return ""
+    return thumbs.picture(size, **attrs)
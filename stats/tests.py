@@ -1,3 +1,1422 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import tempfile
+from datetime import date
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.admin.sites import site as admin_site
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .models import (
+    Team, Player, PescaraGame, Appearance, LeagueTable, LeagueTableEntry, SiteSettings,
+    PlayerStats,
+)
+from .player_stats import refresh_player_stats
+from .context_processors import site_context
+from . import metrics, profiling
+from .page_cache import page_cache_stats
+from .search import suggest
+from .site import SITE_CACHE_KEY, get_site_info
+from .storage import brotli, minify_css
+from .versioning import bump_data_version, get_data_version
+
+
+class StatsTestCase(TestCase):
+    """TestCase that starts every test from an empty cache (rollbacks send no signals)."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+def _settings_queries(ctx):
+    return [q["sql"] for q in ctx.captured_queries if "stats_sitesettings" in q["sql"]]
+
+
+def _make_squad(size, games, start=1):
+    """Create `size` players, each appearing (and scoring once) in every game."""
+    players = [
+        Player.objects.create(first_name=f"N{i}", last_name=f"Apellido{i}", number=i)
+        for i in range(start, start + size)
+    ]
+    Appearance.objects.bulk_create(
+        Appearance(game=g, player=p, goals=1) for p in players for g in games
+    )
+    # bulk_create skips the signals, same as a bulk import would
+    refresh_player_stats(p.pk for p in players)
+    return players
+
+
+class PlayersViewQueryTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.rival = Team.objects.create(name="Rival")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        cls.games = [
+            PescaraGame.objects.create(
+                jornada=j, date=date(2025, 1, j), opponent=cls.rival,
+                result="W", goals_for=2, goals_against=1,
+            )
+            for j in (1, 2, 3)
+        ]
+
+    def _count_queries(self, url):
+        self.client.get(url)  # warm the cached site settings...
+        bump_data_version()   # ...but render the page again
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_squad(self):
+        _make_squad(2, self.games)
+        small = self._count_queries(reverse("players"))
+
+        _make_squad(30, self.games, start=10)
+        large = self._count_queries(reverse("players"))
+
+        self.assertEqual(small, large)
+
+    def test_query_count_constant_for_every_sort_mode(self):
+        _make_squad(30, self.games)
+        baseline = self._count_queries(reverse("players"))
+        for sort in ("games", "goals", "gpm", "number"):
+            with self.subTest(sort=sort):
+                self.assertEqual(self._count_queries(f"{reverse('players')}?sort={sort}"), baseline)
+
+    def test_rows_keep_appearances_in_date_order(self):
+        player = _make_squad(1, list(reversed(self.games)))[0]
+        response = self.client.get(reverse("players"))
+        row = response.context["rows"][0]
+        self.assertEqual(row["player"], player)
+        self.assertEqual([a.game.jornada for a in row["apps"]], [1, 2, 3])
+
+
+class PlayerStatsTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rival = Team.objects.create(name="Rival")
+        cls.player = Player.objects.create(first_name="Ana", last_name="Núñez", number=9)
+
+    def _game(self, jornada, day):
+        return PescaraGame.objects.create(
+            jornada=jornada, date=date(2025, 1, day), opponent=self.rival,
+            result="W", goals_for=1, goals_against=0,
+        )
+
+    def _stats(self):
+        return PlayerStats.objects.get(player=self.player)
+
+    def test_new_player_gets_empty_row(self):
+        st = self._stats()
+        self.assertEqual((st.games_played, st.goals, st.first_appearance), (0, 0, None))
+
+    def test_appearance_save_and_delete_update_row(self):
+        g1, g2, g3 = self._game(1, 1), self._game(2, 8), self._game(3, 15)
+        Appearance.objects.create(game=g1, player=self.player, goals=2)
+        Appearance.objects.create(game=g2, player=self.player, goals=0)
+        a3 = Appearance.objects.create(game=g3, player=self.player, goals=1)
+
+        st = self._stats()
+        self.assertEqual((st.games_played, st.goals, st.goals_per_match), (3, 3, 1.0))
+        self.assertEqual((st.first_appearance, st.last_appearance), (g1.date, g3.date))
+        self.assertEqual((st.scoring_streak, st.best_scoring_streak), (1, 1))
+
+        a3.delete()
+        st = self._stats()
+        self.assertEqual((st.games_played, st.goals, st.scoring_streak), (2, 2, 0))
+        self.assertEqual(st.last_appearance, g2.date)
+
+    def test_game_date_change_and_delete_update_row(self):
+        g1, g2 = self._game(1, 1), self._game(2, 8)
+        Appearance.objects.create(game=g1, player=self.player, goals=1)
+        Appearance.objects.create(game=g2, player=self.player, goals=0)
+        self.assertEqual(self._stats().scoring_streak, 0)
+
+        g1.date = date(2025, 1, 20)
+        g1.save()
+        st = self._stats()
+        self.assertEqual((st.scoring_streak, st.last_appearance), (1, date(2025, 1, 20)))
+
+        g1.delete()
+        st = self._stats()
+        self.assertEqual((st.games_played, st.goals), (1, 0))
+
+    def test_rebuild_command(self):
+        g1 = self._game(1, 1)
+        Appearance.objects.bulk_create([Appearance(game=g1, player=self.player, goals=3)])
+        PlayerStats.objects.all().delete()
+
+        call_command("rebuild_player_stats", stdout=StringIO())
+        st = self._stats()
+        self.assertEqual((st.games_played, st.goals, st.best_scoring_streak), (1, 3, 1))
+
+
+class SiteInfoCacheTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.other = Team.objects.create(name="Delfines")
+        cls.site = SiteSettings.objects.create(site_name="Pescara", home_club=cls.home, max_rounds=30)
+
+    def test_warm_pages_issue_no_settings_queries(self):
+        for name in ("home", "pescara_positions", "players", "standings"):
+            with self.subTest(page=name):
+                self.client.get(reverse(name))  # warm up
+                bump_data_version()  # skip the page cache
+                with CaptureQueriesContext(connection) as ctx:
+                    self.client.get(reverse(name))
+                self.assertEqual(_settings_queries(ctx), [])
+
+    def test_request_memo_skips_cache(self):
+        request = RequestFactory().get("/")
+        info = get_site_info(request)
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertIs(get_site_info(request), info)
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(get_site_info().total_rounds, 30)
+        self.site.max_rounds = 18
+        self.site.save()
+        self.assertEqual(get_site_info().total_rounds, 18)
+
+        self.site.delete()
+        info = get_site_info()
+        self.assertIsNone(info.site)
+        self.assertEqual(info.total_rounds, 25)
+        self.assertEqual(info.home_team, self.home)
+
+    def test_stale_read_before_commit_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.site.max_rounds = 18
+            self.site.save()
+            # another request caching the committed (old) settings meanwhile
+            cache.set(SITE_CACHE_KEY, get_site_info()._replace(total_rounds=30))
+        self.assertEqual(get_site_info().total_rounds, 18)
+
+    def test_make_active_action_invalidates(self):
+        other = SiteSettings.objects.create(site_name="Delfines", home_club=self.other, is_active=False)
+        self.assertEqual(get_site_info().home_team, self.home)
+
+        request = RequestFactory().post("/")
+        model_admin = admin_site._registry[SiteSettings]
+        model_admin.message_user = lambda *args, **kwargs: None
+        model_admin.make_active(request, SiteSettings.objects.filter(pk=other.pk))
+
+        self.assertEqual(get_site_info().home_team, self.other)
+
+
+class SiteContextProcessorTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+
+    def test_nothing_is_resolved_until_read(self):
+        request = RequestFactory().get("/")
+        with self.assertNumQueries(0):
+            context = site_context(request)
+        with self.assertNumQueries(1):
+            self.assertEqual(context["HOME_TEAM"].name, "Pescara")
+            self.assertEqual(context["SITE"].site_name, "Pescara")
+            self.assertEqual(context["pescara_team"].pk, self.home.pk)
+
+    def test_every_public_url_resolves_site_at_most_once(self):
+        import stats.urls
+
+        game = PescaraGame.objects.create(jornada=1, opponent=self.home, result="W")
+        player = Player.objects.create(first_name="Ana", last_name="Núñez", number=9)
+        for pattern in stats.urls.urlpatterns:
+            if set(pattern.pattern.converters) - {"pk"} or pattern.name == "metrics":
+                continue  # versioned assets and instrumentation, not pages
+            kwargs = {}
+            if "pk" in pattern.pattern.converters:
+                kwargs = {"pk": game.pk if pattern.name == "match_detail" else player.pk}
+            url = reverse(pattern.name, kwargs=kwargs)
+            with self.subTest(url=pattern.name):
+                cache.clear()
+                with CaptureQueriesContext(connection) as cold:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                bump_data_version()  # skip the page cache
+                with CaptureQueriesContext(connection) as warm:
+                    self.client.get(url)
+                self.assertLessEqual(len(_settings_queries(cold)), 1)
+                self.assertEqual(_settings_queries(warm), [])
+                self.assertFalse([q for q in warm.captured_queries if "LIKE" in q["sql"]])
+
+
+class ConditionalGetTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+
+    def test_public_pages_send_validators(self):
+        for name in ("home", "standings", "matches", "players", "pescara_positions"):
+            with self.subTest(page=name):
+                response = self.client.get(reverse(name))
+                self.assertTrue(response.has_header("ETag"))
+                self.assertTrue(response.has_header("Last-Modified"))
+                self.assertIn("must-revalidate", response["Cache-Control"])
+
+    def test_current_client_gets_304_without_queries(self):
+        for name in ("home", "standings", "matches", "players", "pescara_positions"):
+            with self.subTest(page=name):
+                etag = self.client.get(reverse(name))["ETag"]
+                with self.assertNumQueries(0):
+                    response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_every_model_change_bumps_version(self):
+        version, _ = get_data_version()
+        etag = self.client.get(reverse("standings"))["ETag"]
+
+        Team.objects.create(name="Rival")
+        self.assertGreater(get_data_version()[0], version)
+        response = self.client.get(reverse("standings"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        for change in (
+            lambda: Player.objects.create(first_name="Ana", last_name="Núñez", number=9),
+            lambda: LeagueTable.objects.create(jornada=1, date=date(2025, 1, 1)),
+            lambda: SiteSettings.objects.get().save(),
+            lambda: Team.objects.get(name="Rival").delete(),
+        ):
+            version, _ = get_data_version()
+            change()
+            self.assertGreater(get_data_version()[0], version)
+
+
+class PageCacheTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.rival = Team.objects.create(name="Rival")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        PescaraGame.objects.create(jornada=1, date=date(2025, 1, 1), opponent=cls.rival, result="W")
+        PescaraGame.objects.create(jornada=2, date=date(2025, 1, 8), opponent=cls.home, result="L")
+
+    def _stats(self, view_name):
+        return next(row for row in page_cache_stats() if row[0] == view_name)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get(reverse("matches"))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("matches"))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self._stats("matches_view")[1:3], (1, 1))
+
+    def test_key_varies_on_view_params_only(self):
+        self.client.get(reverse("matches"), {"result": "W"})
+        response = self.client.get(reverse("matches"), {"result": "L"})
+        self.assertEqual(len(response.context["games"]), 1)
+        with self.assertNumQueries(0):
+            self.client.get(reverse("matches"), {"result": "W", "utm": "x"})
+
+    def test_data_change_invalidates(self):
+        self.client.get(reverse("matches"))
+        PescaraGame.objects.create(jornada=3, date=date(2025, 1, 15), opponent=self.rival, result="D")
+        response = self.client.get(reverse("matches"))
+        self.assertEqual(len(response.context["games"]), 3)
+
+    def test_admin_shows_counters(self):
+        self.client.get(reverse("players"))
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:stats_dataversion_changelist"))
+        self.assertContains(response, "players_view")
+
+        self.client.post(reverse("admin:stats_dataversion_reset_cache_stats"))
+        self.assertEqual(self._stats("players_view")[1:3], (0, 0))
+
+
+class TrajectorySvgTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.rival = Team.objects.create(name="Rival")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        for j, pos in ((1, 4), (2, 2)):
+            table = LeagueTable.objects.create(jornada=j, date=date(2025, 1, j))
+            LeagueTableEntry.objects.create(table=table, team=cls.home, position=pos, points=3 * j)
+            LeagueTableEntry.objects.create(table=table, team=cls.rival, position=1, points=6)
+
+    def test_page_embeds_versioned_svg(self):
+        response = self.client.get(reverse("pescara_positions"))
+        url = response.context["spark_url"]
+        self.assertContains(response, f'src="{url}"')
+        self.assertContains(self.client.get(reverse("home")), f'src="{url}"')
+
+        svg = self.client.get(url)
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+        self.assertIn("immutable", svg["Cache-Control"])
+        self.assertIn(b"<polyline", svg.content)
+
+    def test_svg_rendered_once_per_version(self):
+        url = self.client.get(reverse("pescara_positions")).context["spark_url"]
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_stale_version_redirects_to_current(self):
+        url = self.client.get(reverse("pescara_positions")).context["spark_url"]
+        LeagueTableEntry.objects.filter(team=self.home, table__jornada=2).update(position=1)
+        bump_data_version()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertNotEqual(response["Location"], url)
+        self.assertIn(b">1</text>", self.client.get(response["Location"]).content)
+
+
+class PositionMatrixTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.rival = Team.objects.create(name="Rival")
+        cls.late = Team.objects.create(name="Tardío")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        t1 = LeagueTable.objects.create(jornada=1, date=date(2025, 1, 1))
+        t2 = LeagueTable.objects.create(jornada=2, date=date(2025, 1, 8))
+        LeagueTableEntry.objects.bulk_create([
+            LeagueTableEntry(table=t1, team=cls.home, position=2, points=0),
+            LeagueTableEntry(table=t1, team=cls.rival, position=1, points=3),
+            LeagueTableEntry(table=t2, team=cls.home, position=1, points=3),
+            LeagueTableEntry(table=t2, team=cls.rival, position=3, points=3),
+            LeagueTableEntry(table=t2, team=cls.late, position=2, points=3),
+        ])
+
+    def test_pivot(self):
+        from .views import _position_matrix
+
+        get_data_version()
+        with self.assertNumQueries(2):
+            matrix = _position_matrix()
+        self.assertEqual(matrix["jornadas"], [1, 2])
+        self.assertEqual(
+            [(t["name"], t["positions"], t["points"]) for t in matrix["teams"]],
+            [("Pescara", [2, 1], [0, 3]), ("Tardío", [None, 2], [None, 3]), ("Rival", [1, 3], [3, 3])],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(_position_matrix(), matrix)
+
+    def test_view_highlights_selected_team(self):
+        response = self.client.get(reverse("all_positions"))
+        self.assertEqual(response.context["selected"]["id"], self.home.pk)
+
+        response = self.client.get(reverse("all_positions"), {"team": self.late.pk})
+        self.assertEqual(response.context["selected_rows"], [(1, None, None), (2, 2, 3)])
+        highlighted = [line for line in response.context["lines"] if line["highlight"]]
+        self.assertEqual([line["name"] for line in highlighted], ["Tardío"])
+
+
+class MatchesPaginationTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from datetime import timedelta
+
+        cls.rival = Team.objects.create(name="Rival")
+        cls.player = Player.objects.create(first_name="Ana", last_name="Núñez", number=9)
+        cls.games = [
+            PescaraGame.objects.create(
+                jornada=j, date=date(2024, 1, 1) + timedelta(days=7 * j),
+                opponent=cls.rival, result="W" if j % 2 else "L",
+            )
+            for j in range(1, 71)
+        ]
+        Appearance.objects.create(game=cls.games[0], player=cls.player, goals=2)
+
+    def _walk(self, params):
+        jornadas, query = [], dict(params)
+        while True:
+            response = self.client.get(reverse("matches"), query)
+            jornadas += [g.jornada for g in response.context["games"]]
+            if not response.context["next_qs"]:
+                return jornadas, response
+            query = response.context["next_qs"]
+            query = dict(part.split("=") for part in query.split("&"))
+
+    def test_keyset_pages_cover_everything_once(self):
+        jornadas, last = self._walk({})
+        self.assertEqual(jornadas, list(range(1, 71)))
+
+        prev = self.client.get(reverse("matches") + "?" + last.context["prev_qs"])
+        self.assertEqual([g.jornada for g in prev.context["games"]], list(range(31, 61)))
+
+    def test_filters_combine_with_pages(self):
+        jornadas, _ = self._walk({"result": "W", "from": "2024-03-01"})
+        self.assertEqual(jornadas, [j for j in range(1, 71) if j % 2 and self.games[j - 1].date >= date(2024, 3, 1)])
+
+    def test_query_count_and_projection(self):
+        get_data_version()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("matches"))
+        game_sql = next(q["sql"] for q in ctx.captured_queries if 'FROM "stats_pescaragame"' in q["sql"])
+        self.assertNotIn("stats_appearance", " ".join(q["sql"] for q in ctx.captured_queries))
+        self.assertIn("LIMIT 31", game_sql)
+
+        from django.db.models import Q
+
+        d = date(2024, 6, 1)
+        plan = (
+            PescaraGame.objects.filter(Q(date__gt=d) | Q(jornada__gt=20), date__gte=d)
+            .order_by("date", "jornada").explain()
+        )
+        self.assertRegex(plan, r"SEARCH .*stats_pescaragame.*INDEX .*date")
+
+    def test_appearances_endpoint(self):
+        response = self.client.get(reverse("match_appearances", args=[self.games[0].pk]))
+        self.assertEqual(response.json()["appearances"], [{"number": 9, "name": "A. Núñez", "goals": 2}])
+        self.assertEqual(self.client.get(reverse("match_appearances", args=[999999])).status_code, 404)
+
+
+class OpponentPositionAsOfTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rival = Team.objects.create(name="Rival")
+        cls.other = Team.objects.create(name="Otro")
+        for j, rival_pos in ((1, 5), (2, 3), (3, 1)):
+            table = LeagueTable.objects.create(jornada=j, date=date(2025, 1, 7 * j))
+            LeagueTableEntry.objects.create(table=table, team=cls.rival, position=rival_pos)
+            LeagueTableEntry.objects.create(table=table, team=cls.other, position=2)
+        for j, day in ((1, 2), (2, 14), (3, 20), (4, 28)):
+            PescaraGame.objects.create(jornada=j, date=date(2025, 1, day), opponent=cls.rival, result="D")
+
+    def test_position_from_table_in_force(self):
+        response = self.client.get(reverse("matches"))
+        self.assertEqual(
+            [(g.jornada, g.opponent_position) for g in response.context["games"]],
+            [(1, None), (2, 3), (3, 3), (4, 1)],
+        )
+
+    def test_lookup_is_cached_per_version(self):
+        from .views import _positions_as_of
+
+        get_data_version()
+        with self.assertNumQueries(1):
+            _positions_as_of()
+        with self.assertNumQueries(0):
+            self.assertEqual(_positions_as_of()(date(2025, 1, 7)), {self.rival.pk: 5, self.other.pk: 2})
+
+
+class SyntheticLeagueTests(StatsTestCase):
+    def test_generate_league(self):
+        call_command("generate_synthetic_league", seasons=2, rounds=4, teams=6, squad=12, seed=7, stdout=StringIO())
+
+        self.assertEqual(Team.objects.count(), 6)
+        self.assertEqual(Player.objects.count(), 12)
+        self.assertEqual(PescaraGame.objects.count(), 8)
+        self.assertEqual(LeagueTable.objects.count(), 8)
+        self.assertEqual(LeagueTableEntry.objects.count(), 48)
+        home = get_site_info().home_team
+        self.assertEqual(
+            sorted(LeagueTableEntry.objects.filter(table__jornada=4).values_list("position", flat=True)),
+            [1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6],
+        )
+        self.assertFalse(PescaraGame.objects.filter(opponent=home).exists())
+        goals = sum(PlayerStats.objects.values_list("goals", flat=True))
+        self.assertEqual(goals, sum(PescaraGame.objects.values_list("goals_for", flat=True)))
+
+    def test_too_many_seasons(self):
+        with self.assertRaises(CommandError):
+            call_command("generate_synthetic_league", seasons=6, teams=6, stdout=StringIO())
+
+
+class BenchmarkCompareTests(TestCase):
+    def test_compare_flags_regressions(self):
+        from .benchmarks import compare
+
+        baseline = {"1": {"players": {"cold_ms": 20.0, "queries": 4, "peak_kb": 500.0}}}
+        same = {"1": {"players": {"cold_ms": 24.0, "queries": 4, "peak_kb": 520.0}}}
+        worse = {"1": {"players": {"cold_ms": 60.0, "queries": 35, "peak_kb": 520.0}}}
+        self.assertEqual(compare(same, baseline), [])
+        self.assertEqual(len(compare(worse, baseline)), 2)
+
+
+class RequestMetricsTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        cls.staff = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+
+    def test_requests_are_recorded_per_view(self):
+        for _ in range(3):
+            self.client.get(reverse("players"))
+        self.client.get(reverse("standings"))
+
+        rows = {r["view"]: r for r in metrics.snapshot()}
+        self.assertEqual(set(rows), {"players", "standings"})
+        self.assertEqual(rows["players"]["count"], 3)
+        self.assertGreater(rows["players"]["max_queries"], 0)
+        self.assertGreater(rows["players"]["avg_kb"], 0)
+
+    async def test_async_views_count_their_queries(self):
+        await self.async_client.get(reverse("players"))  # an async view
+        row = next(r for r in metrics.snapshot() if r["view"] == "players")
+        self.assertGreater(row["max_queries"], 0)
+        self.assertGreater(row["avg_db_ms"], 0)
+
+    def test_admin_page_is_staff_only(self):
+        url = reverse("admin:stats_dataversion_metrics")
+        self.client.get(reverse("home"))
+        self.assertEqual(self.client.get(url).status_code, 302)  # to the login page
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(url), "<td>home</td>", html=True)
+
+    def test_prometheus_export(self):
+        self.client.get(reverse("home"))
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+        with self.settings(STATS_METRICS_TOKEN="s3cret"):
+            response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('stats_request_duration_seconds_count{view="home"} 1', text)
+        self.assertIn('stats_request_duration_seconds_bucket{view="home",le="+Inf"} 1', text)
+        self.assertIn('stats_db_queries_total{view="home"}', text)
+
+
+class ProfilingTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        cls.staff = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        cls.player = Player.objects.create(first_name="Ana", last_name="Núñez", number=9)
+
+    def setUp(self):
+        import tempfile
+
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = self.settings(STATS_PROFILE_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_anonymous_flag_is_ignored(self):
+        response = self.client.get(reverse("players"), {"_profile": "1"})
+        self.assertFalse(response.has_header("X-Profile-Report"))
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_staff_profile_report(self):
+        self.client.force_login(self.staff)
+        # a sync view: the frame that issues each query is on the stack
+        url = reverse("player_detail", args=[self.player.pk])
+        self.client.get(url)  # fill the page cache: profiling must bypass it
+        response = self.client.get(url, {"_profile": "1"})
+        name = response["X-Profile-Report"]
+        self.assertEqual([p[0] for p in profiling.list_profiles()], [name])
+
+        report = profiling.profile_path(name).read_text()
+        self.assertIn(f"{url}?_profile=1", report)
+        self.assertIn('FROM "stats_player"', report)
+        self.assertIn("stats/views.py", report)  # the frame that issued the query
+        self.assertIn("cumulative", report)
+
+        download = self.client.get(reverse("admin:stats_dataversion_profile_download", args=[name]))
+        self.assertEqual(download.status_code, 200)
+        self.assertContains(self.client.get(reverse("admin:stats_dataversion_profiles")), name)
+        bad = self.client.get(reverse("admin:stats_dataversion_profile_download", args=["..settings.py"]))
+        self.assertEqual(bad.status_code, 404)
+
+    async def test_async_view_profile_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.staff)
+        response = await self.async_client.get(reverse("players"), {"_profile": "1"})
+        report = await sync_to_async(profiling.profile_path(response["X-Profile-Report"]).read_text)()
+        self.assertIn("queries: ", report)
+        self.assertNotIn("queries: 0 ", report)
+        self.assertIn('FROM "stats_player"', report)
+
+
+class ReplayTrafficTests(TestCase):
+    def test_parse_mix(self):
+        from .management.commands.replay_traffic import _parse_mix
+
+        self.assertEqual(_parse_mix("home=50, players=20"), [("home", 50.0), ("players", 20.0)])
+        with self.assertRaises(CommandError):
+            _parse_mix("home")
+
+
+class SQLiteProfileTests(TestCase):
+    def _wrapper(self, path, alias):
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        settings_dict = {**connection.settings_dict, "NAME": str(path), "TEST": {}, "OPTIONS": {"timeout": 0.2}}
+        return DatabaseWrapper(settings_dict, alias=alias)
+
+    def test_reads_proceed_during_admin_save(self):
+        import tempfile
+        import threading
+        from pathlib import Path
+
+        from django.db import OperationalError
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = Path(tmp.name) / "db.sqlite3"
+
+        writer = self._wrapper(path, "default")
+        self.addCleanup(writer.close)
+        with writer.cursor() as cursor:
+            cursor.execute("SELECT * FROM pragma_journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("CREATE TABLE team (id INTEGER PRIMARY KEY, name TEXT)")
+            cursor.execute("INSERT INTO team (name) VALUES ('Pescara')")
+
+        # An admin save in progress: write lock taken, change not committed.
+        with writer.cursor() as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("UPDATE team SET name = 'Pescara Calcio'")
+
+        result = {}
+
+        def read():
+            reader = self._wrapper(path, "replica")
+            try:
+                with reader.cursor() as cursor:
+                    cursor.execute("SELECT name FROM team")
+                    result["name"] = cursor.fetchone()[0]
+                    try:
+                        cursor.execute("DELETE FROM team")
+                    except OperationalError as exc:
+                        result["write"] = str(exc)
+            finally:
+                reader.close()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result["name"], "Pescara")  # last committed value, no waiting
+        self.assertIn("readonly", result["write"])
+
+        with writer.cursor() as cursor:
+            cursor.execute("COMMIT")
+            cursor.execute("SELECT name FROM team")
+            self.assertEqual(cursor.fetchone()[0], "Pescara Calcio")
+
+    def test_public_views_read_from_replica(self):
+        from unittest import mock
+
+        from . import db
+
+        router = db.ReadWriteRouter()
+        with mock.patch.object(db, "READ_ALIAS", "default"):  # pretend it is configured
+            self.assertIsNone(router.db_for_read(Team))
+            with db.public_reads():
+                self.assertEqual(router.db_for_read(Team), "default")
+            self.assertEqual(router.db_for_write(Team), "default")
+
+        seen = []
+        middleware = db.PublicReadsMiddleware(lambda request: seen.append(db._public_read.get()))
+        for method, name in (("get", "players"), ("post", "players"), ("get", "metrics")):
+            request = getattr(RequestFactory(), method)(reverse(name))
+            request.resolver_match = mock.Mock(url_name=name)
+            middleware.process_view(request, None, (), {})
+            middleware(request)
+        self.assertEqual(seen, [True, False, False])
+        self.assertFalse(db._public_read.get())
+
+
+class AsyncViewsTests(StatsTestCase):
+    PAGES = ("home", "standings", "matches", "players", "pescara_positions")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        rival = Team.objects.create(name="Rival")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        PescaraGame.objects.create(jornada=1, date=date(2025, 1, 5), opponent=rival,
+                                   result="W", goals_for=2, goals_against=0)
+        for jornada, day in ((1, date(2025, 1, 6)), (2, date(2025, 1, 13))):
+            table = LeagueTable.objects.create(jornada=jornada, date=day)
+            LeagueTableEntry.objects.create(table=table, team=cls.home, position=1, played=1, wins=1, points=3)
+            LeagueTableEntry.objects.create(table=table, team=rival, position=2, played=1, losses=1)
+
+    def test_read_views_are_async(self):
+        from asgiref.sync import iscoroutinefunction
+        from django.urls import resolve
+
+        for name in self.PAGES:
+            with self.subTest(page=name):
+                self.assertTrue(iscoroutinefunction(resolve(reverse(name)).func))
+
+    async def test_pages_through_asgi(self):
+        for name in self.PAGES:
+            with self.subTest(page=name):
+                response = await self.async_client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                cached = await self.async_client.get(reverse(name))
+                self.assertEqual(cached.content, response.content)
+                not_modified = await self.async_client.get(reverse(name), headers={"If-None-Match": response["ETag"]})
+                self.assertEqual(not_modified.status_code, 304)
+
+        home = await self.async_client.get(reverse("home"))
+        self.assertContains(home, "J2/")
+        self.assertContains(home, "Rival"[:3])
+
+
+class DashboardSnapshotTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.rival = Team.objects.create(name="Rival")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home, max_rounds=30)
+        cls.played = PescaraGame.objects.create(jornada=1, date=date(2025, 1, 5), opponent=cls.rival,
+                                                result="W", goals_for=2, goals_against=0)
+        table = LeagueTable.objects.create(jornada=1, date=date(2025, 1, 6))
+        LeagueTableEntry.objects.create(table=table, team=cls.rival, position=1, played=1, wins=1, points=3)
+        LeagueTableEntry.objects.create(table=table, team=cls.home, position=2, played=1, draws=1, points=1)
+
+    def test_snapshot_fields(self):
+        from .dashboard import get_dashboard
+
+        call_command("rebuild_dashboard", stdout=StringIO())
+        with self.assertNumQueries(1):
+            snap = get_dashboard()
+            self.assertEqual(snap.last_game.opponent.name, "Rival")
+            self.assertEqual(snap.home_team, self.home)
+        self.assertEqual((snap.latest_jornada, snap.team_count, snap.total_rounds), (1, 2, 30))
+        self.assertEqual((snap.position, snap.points, snap.games_played, snap.max_potential_points), (2, 1, 1, 3))
+        self.assertEqual(snap.last_game, self.played)
+        self.assertIsNone(snap.next_game)
+
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "J1/30")
+        self.assertContains(response, "2º/2")
+
+    def test_rebuilt_on_commit_only(self):
+        from .dashboard import get_dashboard
+        from .models import DashboardSnapshot
+
+        with self.captureOnCommitCallbacks(execute=True):
+            upcoming = PescaraGame.objects.create(jornada=2, date=date(2999, 1, 1), opponent=self.home, result="D")
+        self.assertEqual(DashboardSnapshot.objects.get().next_game, upcoming)
+
+        # a stale row is computed in memory by the public pages, never saved
+        DashboardSnapshot.objects.update(built_on=date(2000, 1, 1))
+        self.assertEqual(get_dashboard().built_on, timezone.localdate())
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertContains(self.client.get(reverse("home")), "J1/30")
+        self.assertFalse([q for q in ctx.captured_queries if not q["sql"].startswith("SELECT")])
+        self.assertEqual(DashboardSnapshot.objects.get().built_on, date(2000, 1, 1))
+
+        # any bump, e.g. after a bulk load or a player edit, rebuilds it too
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version()
+        self.assertEqual(DashboardSnapshot.objects.get().data_version, get_data_version()[0])
+
+
+class StandingsDerivedTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.a = Team.objects.create(name="Ancona")
+        cls.b = Team.objects.create(name="Bari")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        cls.game = PescaraGame.objects.create(jornada=1, date=date(2025, 1, 5), opponent=cls.a,
+                                              result="W", goals_for=1)
+        cls.t1 = LeagueTable.objects.create(jornada=1, date=date(2025, 1, 6))
+        cls.t2 = LeagueTable.objects.create(jornada=2, date=date(2025, 1, 13))
+        for table, order in ((cls.t1, (cls.a, cls.home, cls.b)), (cls.t2, (cls.home, cls.b, cls.a))):
+            for pos, team in enumerate(order, start=1):
+                LeagueTableEntry.objects.create(table=table, team=team, position=pos)
+
+    def _derived(self, table):
+        return {
+            e.team.name: (e.pos_delta, e.last_result_vs_home)
+            for e in table.entries.select_related("team")
+        }
+
+    def test_values_kept_by_signals(self):
+        self.assertEqual(self._derived(self.t2), {
+            "Pescara": (1, ""), "Bari": (1, ""), "Ancona": (-2, "W"),
+        })
+        self.assertEqual(self._derived(self.t1)["Ancona"], (None, "W"))
+
+        self.game.result = "L"
+        self.game.save()
+        self.assertEqual(self._derived(self.t2)["Ancona"], (-2, "L"))
+
+        # a change in the earlier table moves the deltas of the next one
+        LeagueTableEntry.objects.filter(table=self.t1, team=self.b).update(position=9)
+        LeagueTableEntry.objects.get(table=self.t1, team=self.a).save()
+        self.assertEqual(self._derived(self.t2)["Bari"], (7, ""))
+
+        self.t1.delete()
+        self.assertEqual(self._derived(self.t2)["Pescara"], (None, ""))
+
+    def test_standings_queries(self):
+        url = reverse("standings")
+        self.client.get(url)
+        bump_data_version()  # skip the page cache
+        get_data_version()
+        with self.assertNumQueries(4):  # the table, its entries, the previous/next table seeks
+            response = self.client.get(url)
+        self.assertContains(response, "Jornada: 2")
+        self.assertContains(response, '<span class="delta down">▼ 2</span>', html=True)
+        self.assertContains(response, '<span class="chk win">✓</span>', html=True)
+
+    def test_admin_clone_fills_derived(self):
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin_user)
+        self.client.get(reverse("admin:stats_leaguetable_create_from_latest"))
+        clone = LeagueTable.objects.get(jornada=3)
+        self.assertEqual(self._derived(clone), {"Pescara": (0, ""), "Bari": (0, ""), "Ancona": (0, "W")})
+
+    def test_admin_inline_refreshes_once(self):
+        from unittest import mock
+        from . import signals
+
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin_user)
+        entries = list(self.t1.entries.order_by("position"))
+        data = {
+            "jornada": 1, "date": "2025-01-06",
+            "entries-TOTAL_FORMS": 3, "entries-INITIAL_FORMS": 3,
+            "entries-MIN_NUM_FORMS": 0, "entries-MAX_NUM_FORMS": 1000,
+        }
+        # every row changes: Bari first, Ancona last
+        for i, (entry, pos) in enumerate(zip(entries, (3, 2, 1))):
+            data.update({f"entries-{i}-id": entry.pk, f"entries-{i}-table": self.t1.pk,
+                         f"entries-{i}-team": entry.team_id, f"entries-{i}-position": pos,
+                         f"entries-{i}-played": 1, f"entries-{i}-wins": 0, f"entries-{i}-draws": 0,
+                         f"entries-{i}-losses": 0, f"entries-{i}-points": 0,
+                         f"entries-{i}-goal_difference": 0})
+        with mock.patch.object(signals, "refresh_standings", wraps=signals.refresh_standings) as refresh, \
+                mock.patch.object(signals, "bump_data_version", wraps=signals.bump_data_version) as bump:
+            response = self.client.post(reverse("admin:stats_leaguetable_change", args=[self.t1.pk]), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual((refresh.call_count, bump.call_count), (1, 1))
+        self.assertEqual(self._derived(self.t2)["Ancona"], (0, "W"))  # 3 -> 3
+        self.assertEqual(self._derived(self.t2)["Bari"], (-1, ""))  # 1 -> 2
+
+
+class StandingsHistoryTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.rival = Team.objects.create(name="Rival")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        # two seasons with jornadas 1–2 each
+        for day, jornada in ((date(2024, 1, 8), 1), (date(2024, 1, 15), 2),
+                             (date(2025, 1, 6), 1), (date(2025, 1, 13), 2)):
+            table = LeagueTable.objects.create(jornada=jornada, date=day)
+            first, second = (cls.home, cls.rival) if day.day % 2 else (cls.rival, cls.home)
+            LeagueTableEntry.objects.create(table=table, team=first, position=1)
+            LeagueTableEntry.objects.create(table=table, team=second, position=2)
+
+    def _shown(self, **params):
+        response = self.client.get(reverse("standings"), params)
+        table = response.context["table"]
+        return (table.date, table.jornada) if table else None, response
+
+    def test_pick_by_jornada_and_date(self):
+        self.assertEqual(self._shown()[0], (date(2025, 1, 13), 2))
+        self.assertEqual(self._shown(jornada=1)[0], (date(2025, 1, 6), 1))
+        self.assertEqual(self._shown(date="2024-12-31")[0], (date(2024, 1, 15), 2))
+        self.assertEqual(self._shown(date="2024-12-31", jornada=1)[0], (date(2024, 1, 8), 1))
+        shown, response = self._shown(date="2023-01-01")
+        self.assertIsNone(shown)
+        self.assertContains(response, "No hay una tabla para esa jornada o fecha.")
+        self.assertEqual(self._shown(date="2024-02-30")[0], (date(2025, 1, 13), 2))  # bad date ignored
+
+    def test_prev_next_navigation(self):
+        _, response = self._shown(date="2024-01-15", jornada=2)
+        self.assertEqual(response.context["prev_qs"], "date=2024-01-08&jornada=1")
+        self.assertEqual(response.context["next_qs"], "date=2025-01-06&jornada=1")
+        self.assertContains(response, "?date=2025-01-06&amp;jornada=1")
+        # deltas are relative to the previous snapshot, across seasons too
+        deltas = {e.team_id: e.pos_delta for e in self._shown(date="2025-01-06", jornada=1)[1].context["entries"]}
+        self.assertEqual(deltas, {self.home.pk: -1, self.rival.pk: 1})
+        self.assertEqual(self._shown()[1].context["next_qs"], "")
+
+    def test_history_lookups_use_indexes(self):
+        plan = (
+            LeagueTable.objects.filter(date__lte=date(2024, 12, 31))
+            .order_by("-date", "-jornada").values("pk")[:1].explain()
+        )
+        self.assertIn("stats_table_date_jornada_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        plan = LeagueTableEntry.objects.filter(team=self.home).order_by("table").values("position").explain()
+        self.assertIn("stats_entry_team_table_idx", plan)
+
+
+class DeltaSnapshotTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.home = Team.objects.create(name="Pescara")
+        cls.a = Team.objects.create(name="Ancona")
+        cls.b = Team.objects.create(name="Bari")
+        SiteSettings.objects.create(site_name="Pescara", home_club=cls.home)
+        PescaraGame.objects.create(jornada=1, date=date(2025, 1, 5), opponent=cls.a, result="W", goals_for=2)
+        # (team, position, points, goal_difference) per jornada; J2 only moves Bari's DG
+        rows = {
+            1: ((cls.home, 1, 3, 2), (cls.b, 2, 0, 0), (cls.a, 3, 0, -2)),
+            2: ((cls.home, 1, 3, 2), (cls.b, 2, 0, -1), (cls.a, 3, 0, -2)),
+            3: ((cls.b, 1, 3, 1), (cls.home, 2, 3, 2), (cls.a, 3, 0, -2)),
+        }
+        for j, entries in rows.items():
+            table = LeagueTable.objects.create(jornada=j, date=date(2025, 1, 6 + 7 * (j - 1)))
+            for team, pos, pts, dg in entries:
+                LeagueTableEntry.objects.create(table=table, team=team, position=pos, points=pts,
+                                                goal_difference=dg)
+
+    def _views(self):
+        from .views import _position_matrix, _positions_as_of
+
+        tables = {}
+        for j in (1, 2, 3):
+            response = self.client.get(reverse("standings"), {"jornada": j})
+            tables[j] = [
+                (e.team.name, e.position, e.points, e.goal_difference, e.pos_delta, e.last_result_vs_home)
+                for e in response.context["entries"]
+            ]
+        home = self.client.get(reverse("home")).context
+        return (tables, _position_matrix(), _positions_as_of()(date(2025, 1, 14)),
+                (home["pescara_position"], home["team_count"]))
+
+    def test_compact_and_expand_keep_the_views(self):
+        before = self._views()
+        call_command("compact_league_tables", stdout=StringIO())
+        self.assertEqual(
+            list(LeagueTable.objects.order_by("jornada").values_list("storage", flat=True)),
+            ["full", "delta", "delta"],
+        )
+        self.assertEqual(LeagueTableEntry.objects.count(), 6)  # all of J1, Bari in J2, Pescara and Bari in J3
+        self.assertEqual(self._views(), before)
+
+        call_command("compact_league_tables", expand=True, stdout=StringIO())
+        self.assertFalse(LeagueTable.objects.filter(storage="delta").exists())
+        self.assertEqual(LeagueTableEntry.objects.count(), 9)
+        self.assertEqual(self._views(), before)
+
+    def test_admin_clone(self):
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin_user)
+        self.client.get(reverse("admin:stats_leaguetable_create_from_latest"))
+        clone = LeagueTable.objects.get(jornada=4)
+        self.assertEqual(
+            sorted(clone.entries.values_list("team__name", "position", "points", "goal_difference")),
+            [("Ancona", 3, 0, -2), ("Bari", 1, 3, 1), ("Pescara", 2, 3, 2)],
+        )
+
+        with self.settings(STATS_TABLE_STORAGE="delta"):
+            self.client.get(reverse("admin:stats_leaguetable_create_from_latest"))
+        delta = LeagueTable.objects.get(jornada=5)
+        self.assertEqual((delta.storage, delta.entries.count()), ("delta", 0))
+        LeagueTableEntry.objects.create(table=delta, team=self.a, position=3, points=1, goal_difference=-2)
+        entries = self.client.get(reverse("standings")).context["entries"]
+        self.assertEqual([(e.team.name, e.points, e.pos_delta) for e in entries],
+                         [("Bari", 3, 0), ("Pescara", 3, 0), ("Ancona", 1, 0)])
+
+    def _table(self, jornada):
+        from .snapshots import resolve_table
+
+        table = LeagueTable.objects.get(jornada=jornada)
+        return sorted((e.team.name, e.position, e.points, e.goal_difference) for e in resolve_table(table))
+
+    def test_deleting_a_table_keeps_the_later_ones(self):
+        before = {j: self._table(j) for j in (1, 2, 3)}
+        call_command("compact_league_tables", stdout=StringIO())
+
+        LeagueTable.objects.get(jornada=2).delete()
+        self.assertEqual(self._table(3), before[3])
+        LeagueTable.objects.get(jornada=1).delete()
+        self.assertEqual(self._table(3), before[3])
+        self.assertEqual(LeagueTable.objects.get().storage, "full")
+
+    def test_moving_a_table_keeps_every_table(self):
+        before = {j: self._table(j) for j in (1, 2, 3)}
+        call_command("compact_league_tables", stdout=StringIO())
+
+        moved = LeagueTable.objects.get(jornada=2)
+        moved.jornada, moved.date = 4, date(2025, 1, 27)
+        moved.save()
+        self.assertEqual(moved.storage, "full")
+        self.assertEqual((self._table(3), self._table(4)), (before[3], before[2]))
+
+        # a table put in front of a delta one
+        LeagueTable.objects.filter(jornada=3).update(storage="delta")
+        LeagueTableEntry.objects.filter(table__jornada=3, team=self.a).delete()
+        expected = self._table(3)
+        LeagueTable.objects.create(jornada=0, date=date(2025, 1, 10))
+        self.assertEqual(self._table(3), expected)
+
+
+class ThumbnailTests(StatsTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _png(self, size=(600, 400)):
+        out = BytesIO()
+        Image.new("RGBA", size, (220, 30, 30, 255)).save(out, "PNG")
+        return SimpleUploadedFile("escudo.png", out.getvalue(), content_type="image/png")
+
+    def test_variants_built_on_upload(self):
+        team = Team.objects.create(name="Ancona", logo=self._png())
+        team.refresh_from_db()
+        sizes = team.logo_variants["sizes"]
+        self.assertEqual(set(sizes), {"sm", "md", "lg"})
+        self.assertEqual(team.logo_variants["source"], team.logo.name)
+        with default_storage.open(sizes["sm"]["webp"]) as f:
+            self.assertEqual(Image.open(f).size, (48, 32))
+        self.assertLess(default_storage.size(sizes["sm"]["webp"]), default_storage.size(team.logo.name))
+
+        # same content, same names
+        again = Team.objects.create(name="Bari", logo=self._png())
+        self.assertEqual(again.logo_variants["sizes"], sizes)
+
+        table = LeagueTable.objects.create(jornada=1, date=date(2025, 1, 6))
+        LeagueTableEntry.objects.create(table=table, team=team, position=1)
+        response = self.client.get(reverse("standings"))
+        self.assertContains(response, f'<source srcset="{default_storage.url(sizes["sm"]["webp"])}" type="image/webp">')
+        self.assertNotContains(response, team.logo.url)
+
+    def test_unreadable_image_and_backfill(self):
+        broken = Player.objects.create(first_name="Luis", last_name="Pérez", number=9,
+                                       photo=SimpleUploadedFile("foto.png", b"not an image"))
+        self.assertEqual(broken.photo_variants["sizes"], {})
+        self.assertEqual(broken.photo_thumbs.url("md"), broken.photo.url)
+
+        team = Team.objects.create(name="Ancona", logo=self._png())
+        Team.objects.update(logo_variants={})  # e.g. logos uploaded before the variants existed
+        self.assertEqual(Team.objects.get().logo_thumbs.url(), team.logo.url)
+        call_command("build_thumbnails", stdout=StringIO())
+        self.assertNotEqual(Team.objects.get().logo_thumbs.url(), team.logo.url)
+
+
+class StaticBuildTests(TestCase):
+    def test_minify_css(self):
+        css = """/* header */
+.a , .b > .c {
+  content: "  /* kept */  ";
+  color: red;
+}
+@media (max-width: 600px) { .a { margin: 0 auto } }
+"""
+        self.assertEqual(
+            minify_css(css),
+            '.a,.b>.c{content: "  /* kept */  ";color: red}@media (max-width: 600px){.a{margin: 0 auto}}',
+        )
+
+    def test_collectstatic_hashes_minifies_and_compresses(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "stats.storage.PrecompressedManifestStaticFilesStorage"},
+        }
+        with self.settings(STATIC_ROOT=root.name, STORAGES=storages):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            hashed = staticfiles_storage.stored_name("stats/css/styles.css")
+            self.assertRegex(hashed, r"^stats/css/styles\.[0-9a-f]{12}\.css$")
+            with open(staticfiles_storage.path(hashed), "rb") as f:
+                css = f.read()
+            with gzip.open(staticfiles_storage.path(hashed) + ".gz") as f:
+                self.assertEqual(f.read(), css)
+            if brotli is not None:
+                with open(staticfiles_storage.path(hashed) + ".br", "rb") as f:
+                    self.assertEqual(brotli.decompress(f.read()), css)
+            self.assertNotIn(b"/* Font */", css)
+            self.assertNotIn(b"fonts.googleapis.com", css)
+
+    def test_public_pages_render_with_the_manifest(self):
+        home = Team.objects.create(name="Pescara")  # no logo: the placeholder crest
+        SiteSettings.objects.create(site_name="Pescara", home_club=home)
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "stats.storage.PrecompressedManifestStaticFilesStorage"},
+        }
+        with self.settings(STATIC_ROOT=root.name, STORAGES=storages):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            for name in ("home", "standings", "players", "matches", "pescara_positions"):
+                cache.clear()
+                with self.subTest(name):
+                    response = self.client.get(reverse(name))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertRegex(response.content.decode(), r"stats/pescara_placeholder\.[0-9a-f]{12}\.svg")
+
+    def test_google_fonts_until_self_hosted(self):
+        home = Team.objects.create(name="Pescara")
+        SiteSettings.objects.create(site_name="Pescara", home_club=home)
+        for self_hosted, expected in ((False, "fonts.googleapis.com"), (True, "stats/css/fonts.css")):
+            cache.clear()  # the page cache does not vary on settings
+            with self.settings(STATS_SELF_HOSTED_FONTS=self_hosted):
+                self.assertContains(self.client.get(reverse("players")), expected)
+
+
+class SearchTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.nunez = Player.objects.create(first_name="Luis", last_name="Núñez", number=9)
+        cls.garcia = Player.objects.create(first_name="Íñigo", last_name="García", number=10)
+        Player.objects.create(first_name="Luis", last_name="Ortega", number=11, active=False)
+        cls.team = Team.objects.create(name="Nuñez Atlético")
+
+    def _players(self, q):
+        response = self.client.get(reverse("players"), {"q": q})
+        return [r["player"].last_name for r in response.context["rows"]]
+
+    def test_players_q_folds_accents_and_matches_prefixes(self):
+        self.assertEqual(self._players("Nunez"), ["Núñez"])
+        self.assertEqual(self._players("NÚÑ"), ["Núñez"])
+        self.assertEqual(self._players("inigo gar"), ["García"])
+        self.assertEqual(sorted(self._players("luis")), ["Núñez"])  # inactive players stay hidden
+        self.assertEqual(self._players("\"*"), [])
+
+    def test_index_follows_bulk_writes(self):
+        Player.objects.filter(pk=self.garcia.pk).update(last_name="Gómez")
+        Team.objects.bulk_create([Team(name="Pérez FC")])
+        Team.objects.filter(pk=self.team.pk).delete()
+        self.assertEqual([name for _, _, name in suggest("gomez")], ["Íñigo Gómez"])
+        self.assertEqual([(kind, name) for kind, _, name in suggest("perez")], [("team", "Pérez FC")])
+        self.assertEqual(suggest("atletico"), [])
+
+    def test_type_ahead_json(self):
+        url = reverse("search")
+        self.client.get(url, {"q": "warm"})  # data version now cached
+        with self.assertNumQueries(1):
+            data = self.client.get(url, {"q": "nu"}).json()
+        self.assertEqual(
+            sorted((r["type"], r["name"], r["url"]) for r in data["results"]),
+            [
+                ("player", "Luis Núñez", reverse("player_detail", args=[self.nunez.pk])),
+                ("team", "Nuñez Atlético", f"{reverse('matches')}?opponent={self.team.pk}"),
+            ],
+        )
+        self.assertEqual(self.client.get(url, {"q": "  "}).json()["results"], [])
+
+    def test_longer_words_rank_every_hit(self):
+        Player.objects.bulk_create(
+            Player(first_name="Marco", last_name=f"Della Valle Santangelo {i}", number=i) for i in range(300)
+        )
+        best = Player.objects.create(first_name="Marco", last_name="Ruiz", number=300)
+        self.assertEqual(suggest("marco")[0][1], best.pk)  # created last, outside the first 200 hits
+
+
+class ExportTests(StatsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("generate_synthetic_league", rounds=4, teams=4, squad=12, seed=3, stdout=StringIO())
+
+    def _export(self, dataset, fmt, **params):
+        response = self.client.get(reverse("export", args=[dataset, fmt]), params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_and_filters(self):
+        rows = list(csv.reader(StringIO(self._export("partidos", "csv"))))
+        self.assertEqual(rows[0], ["jornada", "date", "opponent", "goals_for", "goals_against", "result"])
+        self.assertEqual(len(rows) - 1, PescaraGame.objects.count())
+
+        second = PescaraGame.objects.get(jornada=2)
+        rows = list(csv.DictReader(StringIO(self._export("apariciones", "csv", jornada=2))))
+        self.assertEqual(len(rows), second.appearances.count())
+        self.assertEqual({r["date"] for r in rows}, {str(second.date)})
+
+        day = f"{second.date:%Y-%m-%d}"
+        self.assertEqual(len(self._export("partidos", "csv", **{"from": day, "to": day}).splitlines()), 2)
+        self.assertEqual(self.client.get(reverse("export", args=["jugadores", "csv"])).status_code, 404)
+
+    def test_ndjson_tables_are_resolved(self):
+        call_command("compact_league_tables", stdout=StringIO())
+        lines = [json.loads(line) for line in self._export("tablas", "ndjson").splitlines()]
+        self.assertEqual(len(lines), 4 * 4)  # every team of every jornada, delta or not
+        self.assertEqual(set(lines[0]), {"date", "jornada", "team", "position", "played", "wins",
+                                         "draws", "losses", "points", "goal_difference"})
+        self.assertEqual([r["position"] for r in lines if r["jornada"] == 3], [1, 2, 3, 4])
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_stats", "tablas", "--format", "csv", "--jornada", "1", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1 + 4)
+        with self.assertRaises(CommandError):
+            call_command("export_stats", "partidos", "--from", "ayer", stdout=StringIO())
+
+    def test_rows_are_public_reads_and_timed(self):
+        from unittest import mock
+
+        from . import db
+
+        seen = []
+        db_for_read = db.ReadWriteRouter.db_for_read
+
+        def spy(router, model, **hints):
+            seen.append(db._public_read.get())
+            return db_for_read(router, model, **hints)
+
+        metrics.reset()
+        with mock.patch.object(db.ReadWriteRouter, "db_for_read", spy):
+            body = self._export("tablas", "csv")
+        self.assertTrue(seen)
+        self.assertTrue(all(seen))  # read while streaming, after the middleware returned
+        self.assertFalse(db._public_read.get())
+
+        row = next(r for r in metrics.snapshot() if r["view"] == "export")
+        self.assertEqual(row["avg_kb"], round(len(body.encode()) / 1024, 1))
+        self.assertGreater(row["max_queries"], 0)
+
+    async def test_streams_under_asgi(self):
+        response = await self.async_client.get(reverse("export", args=["partidos", "ndjson"]))
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content]).splitlines()
+        self.assertEqual(len(lines), 4)
+
+
+class SeasonImportTests(StatsTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def _write(self, name, text):
+        path = f"{self.dir}/{name}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def _import(self, *paths, **opts):
+        out = StringIO()
+        call_command("import_season", *paths, stdout=out, **opts)
+        return out.getvalue()
+
+    def test_round_trip_of_the_exports(self):
+        call_command("generate_synthetic_league", rounds=4, teams=4, squad=12, seed=3, stdout=StringIO())
+        paths = []
+        for dataset in ("tablas", "apariciones", "partidos"):  # the command sorts them
+            paths.append(f"{self.dir}/{dataset}.csv")
+            call_command("export_stats", dataset, "-o", paths[-1], stdout=StringIO(), stderr=StringIO())
+        expected = {
+            "games": list(PescaraGame.objects.order_by("jornada").values_list("jornada", "opponent__name", "result")),
+            "appearances": Appearance.objects.count(),
+            "stats": list(PlayerStats.objects.order_by("player__number").values_list("player__number", "goals")),
+            "entries": LeagueTableEntry.objects.count(),
+        }
+        Appearance.objects.all().delete()
+        PescaraGame.objects.all().delete()
+        LeagueTable.objects.all().delete()
+        refresh_player_stats()
+
+        version = get_data_version()
+        out = self._import(*paths, batch_size=50)
+        self.assertIn("registros/s", out)
+        self.assertEqual(
+            list(PescaraGame.objects.order_by("jornada").values_list("jornada", "opponent__name", "result")),
+            expected["games"],
+        )
+        self.assertEqual(Appearance.objects.count(), expected["appearances"])
+        self.assertEqual(LeagueTableEntry.objects.count(), expected["entries"])
+        self.assertEqual(
+            list(PlayerStats.objects.order_by("player__number").values_list("player__number", "goals")),
+            expected["stats"],
+        )
+        self.assertNotEqual(get_data_version(), version)
+
+        # importing again updates in place
+        self._import(*paths)
+        self.assertEqual(Appearance.objects.count(), expected["appearances"])
+        self.assertEqual(LeagueTable.objects.count(), 4)
+
+    def test_ndjson_creates_and_updates(self):
+        games = self._write("temporada.partidos.ndjson",
+                            '{"jornada": 1, "date": "2025-08-24", "opponent": "Città di Núñez", '
+                            '"goals_for": 2, "goals_against": 1}\n')
+        apps = self._write("temporada.apariciones.ndjson",
+                           '{"jornada": 1, "opponent": "Città di Núñez", "number": 9, '
+                           '"first_name": "José", "last_name": "Peña", "goals": 2}\n')
+        self._import(games, apps)
+        game = PescaraGame.objects.get()
+        self.assertEqual((game.opponent.name, game.result), ("Città di Núñez", "W"))
+        self.assertEqual(Player.objects.get().stats.goals, 2)
+        self.assertEqual(suggest("pena")[0][2], "José Peña")  # FTS triggers fire on bulk inserts
+
+        self._write("temporada.partidos.ndjson",
+                    '{"jornada": 1, "date": "2025-08-24", "opponent": "Città di Núñez", '
+                    '"goals_for": 1, "goals_against": 1}\n')
+        self._import(games)
+        self.assertEqual(PescaraGame.objects.get().result, "D")
+
+    def test_bad_record_rolls_back_its_batch(self):
+        bad = self._write("partidos.csv", "jornada,date,opponent,goals_for,goals_against\n"
+                                          "1,2025-08-24,Ancona,1,0\n2,mañana,Bari,0,0\n")
+        with self.assertRaisesMessage(CommandError, "partidos.csv:3"):
+            self._import(bad)
+        self.assertFalse(PescaraGame.objects.exists())
+        orphan = self._write("apariciones.csv", "jornada,opponent,number,first_name,last_name,goals\n"
+                                                "7,Bari,9,José,Peña,1\n")
+        with self.assertRaisesMessage(CommandError, "no existe el partido"):
+            self._import(orphan)
+
+    def test_malformed_records_name_their_line(self):
+        cases = {
+            "partidos.ndjson": ('{"jornada": 1, "date": "2025-08-24", "opponent": "Bari"}\n{"jornada": 2,\n',
+                                "partidos.ndjson:2: JSON inválido"),
+            "apariciones.ndjson": ("[1, 2]\n", "apariciones.ndjson:1: el registro no es un objeto"),
+            "partidos.csv": ("jornada,date,opponent,goals_for\n1,2025-08-24,Bari,-1\n",
+                             "partidos.csv:2: goals_for no puede ser negativo"),
+        }
+        for name, (text, message) in cases.items():
+            with self.subTest(name), self.assertRaisesMessage(CommandError, message):
+                self._import(self._write(name, text))
+        self.assertFalse(PescaraGame.objects.exists())
+
+        # points and goal_difference can be negative
+        self._import(self._write("tablas.csv", "date,jornada,team,position,points,goal_difference\n"
+                                               "2025-08-25,1,Bari,1,-1,-3\n"))
+        self.assertEqual(LeagueTableEntry.objects.get().goal_difference, -3)
+
+    def test_import_keeps_the_delta_tables(self):
+        from .snapshots import resolve_table
+
+        def resolved(jornada):
+            table = LeagueTable.objects.get(jornada=jornada)
+            return sorted((e.team.name, e.position, e.points) for e in resolve_table(table))
+
+        header = "date,jornada,team,position,points\n"
+        self._import(self._write("tablas.csv", header + "".join(
+            f"2025-08-{day},{j},{team},{pos},{pts}\n"
+            for day, j, rows in ((25, 1, (("A", 1, 3), ("B", 2, 1), ("C", 3, 0))),
+                                 (31, 3, (("A", 1, 6), ("B", 2, 1), ("C", 3, 0))))
+            for team, pos, pts in rows
+        )))
+        call_command("compact_league_tables", stdout=StringIO())
+        self.assertEqual(LeagueTable.objects.get(jornada=3).storage, "delta")
+        before = resolved(3)
+
+        with self.settings(STATS_TABLE_STORAGE="delta"):
+            # a new table in between, and a corrected row of J1
+            self._import(self._write("tablas.csv", header + "2025-08-28,2,C,1,9\n2025-08-25,1,B,2,2\n"))
+        self.assertEqual(resolved(3), before)
+        self.assertEqual(resolved(2), [("C", 1, 9)])
+        self.assertEqual(resolved(1), [("A", 1, 3), ("B", 2, 2), ("C", 3, 0)])
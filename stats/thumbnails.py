@@ -0,0 +1,116 @@
+"""
+Resized variants of the uploaded images (Team.logo, Player.photo).
+
+The pages show logos at 24–40px and avatars at 64px, so serving the
+originals wastes most of the bytes. When an image is saved (stats/signals.py)
+or backfilled (``manage.py build_thumbnails``), every size in SIZES is
+written as WebP and PNG under a name derived from the source's content hash,
+and the names are recorded on the row (`<field>_variants`). Rendering only
+reads that JSON: no file is opened per request. Until the variants exist,
+or when the source is not a readable image, the original is served.
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+from PIL import Image, ImageOps
+
+# name -> bounding box in px (about 2x the largest CSS size it is used at)
+SIZES = {"sm": 48, "md": 128, "lg": 192}
+FORMATS = ("webp", "png")
+THUMBNAIL_DIR = "thumbs"
+
+# model -> image fields with a `<field>_variants` JSONField next to them
+THUMBNAIL_FIELDS = {"Team": ("logo",), "Player": ("photo",)}
+
+
+class Thumbnails:
+    """The variants of one image field, as exposed by Team.logo_thumbs etc."""
+
+    def __init__(self, image, variants):
+        self.image = image
+        variants = variants or {}
+        # variants made for a previous upload don't count
+        self.sizes = variants.get("sizes", {}) if image and variants.get("source") == image.name else {}
+
+    def __bool__(self):
+        return bool(self.image)
+
+    def url(self, size="sm", fmt="webp"):
+        """URL of a variant, or of the original until it exists ("" without an image)."""
+        name = self.sizes.get(size, {}).get(fmt)
+        if name:
+            return default_storage.url(name)
+        return self.image.url if self.image else ""
+
+    def picture(self, size="sm", **attrs):
+        """<picture> with the WebP variant and the PNG one as fallback."""
+        img = format_html("<img{}>", flatatt({"src": self.url(size, "png"), **attrs}))
+        if not self.sizes.get(size):
+            return img
+        return format_html('<picture><source srcset="{}" type="image/webp">{}</picture>', self.url(size, "webp"), img)
+
+
+def _render(source, px, fmt):
+    image = source.copy()
+    image.thumbnail((px, px), Image.LANCZOS)
+    out = BytesIO()
+    if fmt == "webp":
+        image.save(out, "WEBP", quality=80, method=6)
+    else:
+        image.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+def build_variants(image):
+    """
+    Write the variants of `image` (a FieldFile) that don't exist yet and
+    return {"source": name, "sizes": {size: {fmt: storage name}}}; sizes
+    is empty when the file can't be read as an image.
+    """
+    variants = {"source": image.name, "sizes": {}}
+    try:
+        with image.open("rb") as f:
+            data = f.read()
+        source = Image.open(BytesIO(data))
+        source = ImageOps.exif_transpose(source)
+        source = source.convert("RGBA" if "A" in source.getbands() or "transparency" in source.info else "RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return variants
+
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    for size, px in SIZES.items():
+        for fmt in FORMATS:
+            name = f"{THUMBNAIL_DIR}/{digest}-{size}.{fmt}"
+            if not default_storage.exists(name):
+                # same content, same name: re-uploads and backfills reuse the file
+                name = default_storage.save(name, ContentFile(_render(source, px, fmt)))
+            variants["sizes"].setdefault(size, {})[fmt] = name
+    return variants
+
+
+def refresh_thumbnails(instance, force=False):
+    """
+    Bring the variants of `instance`'s image fields up to date with their
+    current file and store them with a queryset update (no signals).
+    Returns True when something changed.
+    """
+    changed = {}
+    for field in THUMBNAIL_FIELDS.get(type(instance).__name__, ()):
+        image = getattr(instance, field)
+        current = getattr(instance, f"{field}_variants") or {}
+        if not image:
+            variants = {}
+        elif force or current.get("source") != image.name:
+            variants = build_variants(image)
+        else:
+            continue
+        if variants != current:
+            setattr(instance, f"{field}_variants", variants)
+            changed[f"{field}_variants"] = variants
+    if changed:
+        type(instance).objects.filter(pk=instance.pk).update(**changed)
+    return bool(changed)
@@ -6,7 +6,13 @@ urlpatterns = [
     path("tabla/", views.standings_view, name="standings"), # ← antes era ""
     path("partidos/", views.matches_view, name="matches"),
     path("partido/<int:pk>/", views.match_detail, name="match_detail"),
+    path("partido/<int:pk>/apariciones.json", views.match_appearances_json, name="match_appearances"),
     path("jugadores/", views.players_view, name="players"),
     path("jugador/<int:pk>/", views.player_detail, name="player_detail"),
+    path("buscar.json", views.search_json, name="search"),
     path("posiciones/", views.pescara_positions_view, name="pescara_positions"),
+    path("posiciones/todos/", views.all_positions_view, name="all_positions"),
+    path("posiciones/trayectoria-v<int:version>.svg", views.pescara_positions_svg, name="pescara_positions_svg"),
+    path("exportar/<slug:dataset>.<slug:fmt>", views.export_view, name="export"),
+    path("metricas/", views.metrics_view, name="metrics"),
 ]
\ No newline at end of file
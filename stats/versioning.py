@@ -0,0 +1,107 @@
+"""
+Global data-version stamp.
+
+Every save/delete of the stats models bumps a single DataVersion row (see
+stats/signals.py) and schedules the home page snapshot rebuild
+(stats/dashboard.py). The public views derive their ETag/Last-Modified from it,
+so a client that is already current gets a 304 without any database work:
+the stamp itself is read from the cache.
+"""
+from datetime import datetime, time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+VERSION_CACHE_KEY = "stats:data-version"
+# Bounds how long a process with a private (locmem) cache can miss a bump made
+# by another process; with a shared cache the bump is seen immediately.
+VERSION_CACHE_TIMEOUT = getattr(settings, "STATS_DATA_VERSION_TIMEOUT", 30)
+
+
+def get_data_version():
+    """Return (version, updated_at) for the current data."""
+    stamp = cache.get(VERSION_CACHE_KEY)
+    if stamp is None:
+        from .models import DataVersion
+
+        row = DataVersion.objects.filter(pk=1).values_list("version", "updated_at").first()
+        stamp = row or (0, timezone.now())
+        cache.set(VERSION_CACHE_KEY, stamp, VERSION_CACHE_TIMEOUT)
+    return stamp
+
+
+def bump_data_version():
+    """Advance the stamp; called for every change to the stats models."""
+    from .models import DataVersion
+
+    now = timezone.now()
+    updated = DataVersion.objects.filter(pk=1).update(version=F("version") + 1, updated_at=now)
+    if not updated:
+        DataVersion.objects.get_or_create(pk=1, defaults={"version": 2, "updated_at": now})
+    cache.delete(VERSION_CACHE_KEY)
+    # Readers may re-cache the old stamp before the write commits; drop it again
+    # once the new data is visible.
+    transaction.on_commit(lambda: cache.delete(VERSION_CACHE_KEY))
+    # The home page snapshot records the version it was built for, so every
+    # bump (from signals or bulk loads) makes it stale: rebuild it after commit.
+    from .dashboard import schedule_dashboard_rebuild
+
+    schedule_dashboard_rebuild()
+
+
+# --------------------
+# Conditional GET
+# --------------------
+
+def _validators():
+    """(ETag, Last-Modified timestamp) of the public pages right now."""
+    version, updated_at = get_data_version()
+    today = timezone.localdate()
+    # the home page also depends on today's date (last/next game)
+    etag = f'"v{version}-{today:%Y%m%d}"'
+    midnight = timezone.make_aware(datetime.combine(today, time.min))
+    return etag, int(max(updated_at, midnight).timestamp())
+
+
+def _finish(request, response, etag, last_modified):
+    if request.method in ("GET", "HEAD"):
+        if not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(last_modified)
+        response.headers.setdefault("ETag", etag)
+    patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    return response
+
+
+def data_conditional(view):
+    """
+    ETag/Last-Modified from the data version; answers 304 before the view runs.
+    Responses ask browsers and proxies to revalidate on every use. Works for
+    sync and async views.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            etag, last_modified = await sync_to_async(_validators)()
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return _finish(request, response, etag, last_modified)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        etag, last_modified = _validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        return _finish(request, response, etag, last_modified)
+
+    return wrapper
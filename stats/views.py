@@ -1,10 +1,19 @@
 # stats/views.py
+import asyncio
+from bisect import bisect_right
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import models
-from django.db.models import Q, Count, Sum, Max
-from django.shortcuts import render, get_object_or_404
-from django.utils import timezone
+from django.db.models import Q, Max, Prefetch
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django.utils.dateparse import parse_date
 
 from .models import (
@@ -13,56 +22,53 @@ from .models import (
     PescaraGame,
     Appearance,
     LeagueTable,
-    SiteSettings,
-
 )
+from . import metrics
+from .dashboard import get_dashboard
+from .exports import DATASETS, FORMATS as EXPORT_FORMATS, aiter_chunks, export_chunks, parse_filters, public_chunks
+from .search import match_expression, matching_ids, suggest
+from .site import get_site_info
+from .snapshots import resolve_table, resolved_rows
+from .page_cache import cache_public_page
+from .versioning import data_conditional, get_data_version
 
 # --------------------
 # Constants / helpers
 # --------------------
 
+# Lifetime of cache entries derived from the data (SVGs, matrices, indexes).
+# Their keys carry the data version, so this only bounds how long stale
+# versions linger.
+DERIVED_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# The read-only pages (home, standings, matches, players, positions) are async
+# views: under ASGI a worker keeps serving other clients while their queries
+# run. Templates may still touch the ORM (lazy context, related objects), so
+# they render off the event loop.
+_arender = sync_to_async(render)
+
+
 # --- helpers to read the active site + home club -----------------------------
-def _active_site():
-    from .models import SiteSettings  # import here to avoid circulars if any
-    try:
-        return (
-            SiteSettings.objects
-            .select_related("home_club")
-            .filter(is_active=True)
-            .first()
-        )
-    except Exception:
-        return None
+# All three read the cached resolution in stats/site.py; passing the request
+# memoizes it for the rest of the request.
+def _active_site(request=None):
+    return get_site_info(request).site
 
 
-def _home_team_fallback():
+def _home_team_fallback(request=None):
     """
     Use active SiteSettings.home_club when present; otherwise fall back to the
     Pescara team (kept for compatibility with your existing DB) or the first team.
     """
-    site = _active_site()
-    if site and site.home_club_id:
-        return site.home_club
-
-    # legacy/fallback – keep names so nothing breaks
-    return (Team.objects.filter(name__icontains="pescara").first()
-            or Team.objects.first())
+    return get_site_info(request).home_team
 
 
-def _total_rounds():
+def _total_rounds(request=None):
     """
     Read the maximum number of jornadas from SiteSettings (max_rounds).
     Falls back to 25 if not set or invalid.
     """
-    site = _active_site()
-    if site and getattr(site, "max_rounds", None):
-        try:
-            val = int(site.max_rounds)
-            if val > 0:
-                return val
-        except Exception:
-            pass
-    return 25
+    return get_site_info(request).total_rounds
 
 
 def _lerp(a, b, t):
@@ -92,78 +98,141 @@ def _gradient_color(pos, max_pos):
 # Standings
 # --------------------
 
-def standings_view(request):
+def _requested_tables(request):
     """
-    Show latest LeagueTable, with deltas vs previous table and last result vs Pescara.
+    LeagueTables matching ?jornada= and/or ?date=, newest first: with a date,
+    the table in force on that day; with a jornada, the latest table of that
+    jornada; with both, that jornada on or before the date (prev/next links
+    carry both, i.e. an exact table). Every variant is a seek on the
+    (date, jornada) or (jornada, date) index.
     """
-    latest = (
-        LeagueTable.objects
-        .order_by("-date", "-jornada")
-        .prefetch_related("entries__team")
-        .first()
-    )
-    if not latest:
-        return render(request, "stats/standings.html", {"table": None, "entries": []})
-
-    prev = (
-        LeagueTable.objects
-        .filter(Q(date__lt=latest.date) | Q(date=latest.date, jornada__lt=latest.jornada))
-        .order_by("-date", "-jornada")
-        .prefetch_related("entries__team")
-        .first()
-    )
+    qs = LeagueTable.objects.order_by("-date", "-jornada")
+    jornada = request.GET.get("jornada", "")
+    try:
+        day = parse_date(request.GET.get("date", ""))
+    except ValueError:
+        day = None
+    if jornada.isdigit():
+        qs = qs.filter(jornada=int(jornada))
+    if day:
+        qs = qs.filter(date__lte=day)
+    return qs
 
-    prev_map = {}
-    if prev:
-        for pe in prev.entries.all():
-            prev_map[pe.team_id] = pe.position
-
-    entries = list(latest.entries.select_related("team").order_by("position"))
-
-    for e in entries:
-        prev_pos = prev_map.get(e.team_id)
-        if prev_pos is None:
-            e.pos_delta = None
-            e.pos_delta_abs = None
-        else:
-            e.pos_delta = prev_pos - e.position
-            e.pos_delta_abs = abs(e.pos_delta)
-
-    # last head-to-head vs each opponent
-    opp_ids = [e.team_id for e in entries]
-    last_vs = {}
-    games_qs = (
-        PescaraGame.objects
-        .filter(opponent_id__in=opp_ids)
-        .filter(Q(date__lt=latest.date) | Q(date=latest.date))
-        .order_by("opponent_id", "-date", "-jornada")
-        .values("opponent_id", "result")
-    )
-    for g in games_qs:
-        last_vs.setdefault(g["opponent_id"], g["result"])
 
-    for e in entries:
-        e.played_result = last_vs.get(e.team_id)
+def _table_qs(table):
+    return f"date={table[0]:%Y-%m-%d}&jornada={table[1]}"
 
-    return render(request, "stats/standings.html", {"table": latest, "entries": entries})
+
+@data_conditional
+@cache_public_page("jornada", "date")
+async def standings_view(request):
+    """
+    Show the latest LeagueTable, or the one picked with ?jornada=/?date=,
+    with links to the tables before and after it. The position change since
+    the previous table and the last result against each team are stored on
+    the entries (stats/standings.py); the entries come from the snapshot
+    resolver (stats/snapshots.py), cached per table, so delta-encoded tables
+    show in full. The neighbours are one index seek each.
+    """
+    tables = _requested_tables(request)
+    table = await tables.afirst()
+    entries = await sync_to_async(resolve_table)(table) if table else []
+    context = {
+        "table": table,
+        "entries": entries,
+        "requested": bool(request.GET.get("jornada") or request.GET.get("date")),
+    }
+    if table:
+        earlier = Q(date__lt=table.date) | Q(date=table.date, jornada__lt=table.jornada)
+        later = Q(date__gt=table.date) | Q(date=table.date, jornada__gt=table.jornada)
+        prev_table, next_table = await asyncio.gather(
+            LeagueTable.objects.filter(earlier).order_by("-date", "-jornada").values_list("date", "jornada").afirst(),
+            LeagueTable.objects.filter(later).order_by("date", "jornada").values_list("date", "jornada").afirst(),
+        )
+        context["prev_qs"] = _table_qs(prev_table) if prev_table else ""
+        context["next_qs"] = _table_qs(next_table) if next_table else ""
+    return await _arender(request, "stats/standings.html", context)
 
 
 # --------------------
 # Matches
 # --------------------
 
-def matches_view(request):
+MATCHES_PAGE_SIZE = 30
+POSITIONS_INDEX_KEY = "stats:positions-index:{version}"
+
+
+def _positions_as_of():
+    """
+    Return a lookup `day -> {team_id: position}` for the LeagueTable in force
+    on that day (the latest table dated on or before it; {} before the first).
+
+    All tables are resolved (stats/snapshots.py) into a list sorted by
+    (date, jornada), cached per data version, so each lookup is a bisect over
+    the table dates.
+    """
+    version, _ = get_data_version()
+    key = POSITIONS_INDEX_KEY.format(version=version)
+    index = cache.get(key)
+    if index is None:
+        dates, tables = [], []
+        for _, day, _, state in resolved_rows():
+            if state:
+                dates.append(day)
+                tables.append({team_id: pos for team_id, (pos,) in state.items()})
+        index = (dates, tables)
+        cache.set(key, index, DERIVED_CACHE_TIMEOUT)
+
+    dates, tables = index
+
+    def lookup(day):
+        i = bisect_right(dates, day)
+        return tables[i - 1] if i else {}
+
+    return lookup
+
+
+def _parse_cursor(value):
+    """ "2025-01-31.7" -> (date(2025, 1, 31), 7); None when malformed. """
+    day, _, jornada = (value or "").partition(".")
+    try:
+        day = parse_date(day)
+    except ValueError:
+        return None
+    if not day or not jornada.isdigit():
+        return None
+    return day, int(jornada)
+
+
+def _cursor(game):
+    return f"{game.date:%Y-%m-%d}.{game.jornada}"
+
+
+@data_conditional
+@cache_public_page("result", "opponent", "from", "to", "after", "before")
+async def matches_view(request):
+    """
+    Games in (date, jornada) order, paginated by keyset: ?after=/?before= carry
+    the (date, jornada) of the last/first game shown, so every page is a seek
+    on the date index rather than an OFFSET. Only the summary columns are
+    loaded; a game's appearances come from match_appearances_json when its
+    row is expanded.
+    """
     qs = (
         PescaraGame.objects
         .select_related("opponent")
-        .prefetch_related("appearances__player")
-        .order_by("date")
+        .only("jornada", "date", "result", "goals_for", "goals_against",
+              "opponent__name", "opponent__logo", "opponent__logo_variants")
     )
 
     result = request.GET.get("result")
     if result in {"W", "D", "L"}:
         qs = qs.filter(result=result)
 
+    opponent = request.GET.get("opponent", "")
+    if opponent.isdigit():
+        qs = qs.filter(opponent_id=int(opponent))
+
     dfrom = request.GET.get("from")
     dto = request.GET.get("to")
     if dfrom:
@@ -175,47 +244,110 @@ def matches_view(request):
         if dt:
             qs = qs.filter(date__lte=dt)
 
-    games = list(qs)
-
-    latest_table = LeagueTable.objects.order_by("-date", "-jornada").first()
-    pos_by_team = {}
-    if latest_table:
-        for e in latest_table.entries.all():
-            pos_by_team[e.team_id] = e.position
-
+    after = _parse_cursor(request.GET.get("after"))
+    before = _parse_cursor(request.GET.get("before")) if not after else None
+    if before:
+        d, j = before
+        page = [
+            g async for g in
+            qs.filter(Q(date__lt=d) | Q(jornada__lt=j), date__lte=d)
+            .order_by("-date", "-jornada")[:MATCHES_PAGE_SIZE + 1]
+            .aiterator()
+        ]
+        has_prev, has_next = len(page) > MATCHES_PAGE_SIZE, True
+        games = page[:MATCHES_PAGE_SIZE][::-1]
+    else:
+        if after:
+            d, j = after
+            # the redundant date bound keeps the seek a range scan on the date index
+            qs = qs.filter(Q(date__gt=d) | Q(jornada__gt=j), date__gte=d)
+        page = [g async for g in qs.order_by("date", "jornada")[:MATCHES_PAGE_SIZE + 1].aiterator()]
+        has_prev, has_next = bool(after), len(page) > MATCHES_PAGE_SIZE
+        games = page[:MATCHES_PAGE_SIZE]
+
+    def page_qs(key, game):
+        params = request.GET.copy()
+        params.pop("after", None)
+        params.pop("before", None)
+        params[key] = _cursor(game)
+        return params.urlencode()
+
+    positions = await sync_to_async(_positions_as_of)()
     for g in games:
-        g.opponent_position = pos_by_team.get(g.opponent_id)
+        g.opponent_position = positions(g.date).get(g.opponent_id)
 
-    return render(
+    return await _arender(
         request,
         "stats/matches.html",
-        {"games": games, "result": result or "", "from": dfrom or "", "to": dto or ""},
+        {
+            "games": games,
+            "result": result or "",
+            "from": dfrom or "",
+            "to": dto or "",
+            "prev_qs": page_qs("before", games[0]) if games and has_prev else "",
+            "next_qs": page_qs("after", games[-1]) if games and has_next else "",
+        },
+    )
+
+
+@data_conditional
+@cache_public_page()
+def match_appearances_json(request, pk):
+    """Appearances of one game, for the expandable rows on the matches page."""
+    get_object_or_404(PescaraGame.objects.only("pk"), pk=pk)
+    apps = (
+        Appearance.objects
+        .filter(game_id=pk)
+        .order_by("player__number")
+        .values_list("player__number", "player__first_name", "player__last_name", "goals")
     )
+    return JsonResponse({
+        "game": pk,
+        "appearances": [
+            {"number": number, "name": f"{first[:1]}. {last}", "goals": goals}
+            for number, first, last, goals in apps
+        ],
+    })
 
 
 # --------------------
 # Players
 # --------------------
 
-def players_view(request):
+@data_conditional
+@cache_public_page("sort", "q")
+async def players_view(request):
     # sort: games | goals | gpm | number
     sort = request.GET.get("sort", "games")
     q = request.GET.get("q", "").strip()
 
     base = Player.objects.filter(active=True)
     if q:
-        base = base.filter(Q(first_name__icontains=q) | Q(last_name__icontains=q))
-
-    players = base.annotate(
-        gp=Count("appearances__game", distinct=True),
-        goals_total=Sum("appearances__goals"),
+        # accent-insensitive prefix search on the FTS index (stats/search.py)
+        expression = match_expression(q)
+        base = base.filter(pk__in=matching_ids("player", expression)) if expression else base.none()
+
+    # Totals come from the denormalized PlayerStats row; all appearances for
+    # the listed players come in one extra query (grouped per player by the
+    # prefetch) instead of one query per card.
+    players = base.select_related("stats").prefetch_related(
+        Prefetch(
+            "appearances",
+            queryset=(
+                Appearance.objects
+                .select_related("game", "game__opponent")
+                .order_by("game__date")
+            ),
+            to_attr="apps",
+        )
     )
 
     rows = []
-    for p in players:
-        p.goals_total = p.goals_total or 0
-        gpm = round(p.goals_total / p.gp, 2) if p.gp else 0
-        rows.append({"player": p, "gpm": gpm})
+    async for p in players:  # aiterator() cannot prefetch (Django 4.2)
+        st = getattr(p, "stats", None)
+        p.gp = st.games_played if st else 0
+        p.goals_total = st.goals if st else 0
+        rows.append({"player": p, "gpm": st.goals_per_match if st else 0})
 
     if sort == "goals":
         rows.sort(key=lambda r: (r["player"].goals_total, r["gpm"]), reverse=True)
@@ -226,34 +358,58 @@ def players_view(request):
     else:  # games
         rows.sort(key=lambda r: (r["player"].gp, r["player"].goals_total), reverse=True)
 
-    player_rows = []
-    for r in rows:
-        p = r["player"]
-        apps = (
-            Appearance.objects
-            .filter(player=p)
-            .select_related("game", "game__opponent")
-            .order_by("game__date")
-        )
-        player_rows.append({"player": p, "gpm": r["gpm"], "apps": apps})
+    player_rows = [
+        {"player": r["player"], "gpm": r["gpm"], "apps": r["player"].apps}
+        for r in rows
+    ]
 
-    return render(request, "stats/players.html", {"rows": player_rows, "sort": sort, "q": q})
+    return await _arender(request, "stats/players.html", {"rows": player_rows, "sort": sort, "q": q})
 
 
+@data_conditional
+async def search_json(request):
+    """
+    Type-ahead over player and team names: one FTS5 query (see
+    stats.search.suggest for the ranking). Not page-cached: nearly every
+    keystroke is a new query string.
+    """
+    q = request.GET.get("q", "").strip()[:80]
+    matches_url = reverse("matches")
+    results = [
+        {
+            "type": kind,
+            "id": pk,
+            "name": name,
+            "url": reverse("player_detail", args=[pk]) if kind == "player" else f"{matches_url}?opponent={pk}",
+        }
+        for kind, pk, name in await sync_to_async(suggest)(q)
+    ]
+    return JsonResponse({"q": q, "results": results})
+
+
+@data_conditional
+@cache_public_page()
 def player_detail(request, pk):
-    p = get_object_or_404(Player, pk=pk)
+    p = get_object_or_404(Player.objects.select_related("stats"), pk=pk)
     apps = (
         Appearance.objects
         .filter(player=p)
         .select_related("game", "game__opponent")
         .order_by("game__date")
     )
-    totals = apps.aggregate(gp=Count("game", distinct=True), goals=Sum("goals"))
-    totals["goals"] = totals["goals"] or 0
-    gpm = round(totals["goals"] / totals["gp"], 2) if totals["gp"] else 0
+    st = getattr(p, "stats", None)
+    totals = {
+        "gp": st.games_played if st else 0,
+        "goals": st.goals if st else 0,
+        "streak": st.scoring_streak if st else 0,
+        "best_streak": st.best_scoring_streak if st else 0,
+    }
+    gpm = st.goals_per_match if st else 0
     return render(request, "stats/player_detail.html", {"p": p, "apps": apps, "totals": totals, "gpm": gpm})
 
 
+@data_conditional
+@cache_public_page()
 def match_detail(request, pk):
     game = get_object_or_404(PescaraGame.objects.select_related("opponent"), pk=pk)
     apps = (
@@ -269,85 +425,29 @@ def match_detail(request, pk):
 # Home (hero)
 # --------------------
 
-def home_view(request):
+@data_conditional
+@cache_public_page()
+async def home_view(request):
     """
-    Front page hero with last/next game and small summary cards.
+    Front page hero with last/next game and small summary cards, read from
+    the precomputed DashboardSnapshot (stats/dashboard.py) in one query.
     Keeps the existing hero design; also provides data for buttons,
     including a link to the positions trajectory page.
     """
-    today = timezone.now().date()
-
-    # Last and next game
-    last_game = (
-        PescaraGame.objects
-        .select_related("opponent")
-        .filter(date__lte=today)
-        .order_by("-date", "-jornada")
-        .first()
-    )
-    next_game = (
-        PescaraGame.objects
-        .select_related("opponent")
-        .filter(date__gt=today)
-        .order_by("date", "jornada")
-        .first()
-    )
-
-    # Latest table and Pescara entry
-    table = (
-        LeagueTable.objects
-        .order_by("-date", "-jornada")
-        .prefetch_related("entries__team")
-        .first()
-    )
-
-    pescara_team = _home_team_fallback()
-
-    entry = None
-    team_count = 0
-    latest_jornada = None
-    pescara_position = None
-    pescara_points = None
-    games_played = 0
-    max_potential_points = 0
-
-    if table:
-        latest_jornada = table.jornada
-        team_count = table.entries.count()
-
-        # Find Pescara's row
-        for e in table.entries.all():
-            if pescara_team and e.team_id == pescara_team.id:
-                entry = e
-                pescara_position = getattr(e, "position", None)
-                pescara_points = getattr(e, "points", None)
-
-                games_played = (
-                    getattr(e, "played", None) or
-                    getattr(e, "games_played", None)
-                )
-                if games_played is None:
-                    w = getattr(e, "wins", 0) or 0
-                    d = getattr(e, "draws", 0) or 0
-                    l = getattr(e, "losses", 0) or 0
-                    games_played = w + d + l
-
-                max_potential_points = (games_played or 0) * 3
-                break
-
-    return render(request, "stats/home.html", {
-        "latest_jornada": latest_jornada,
-        "total_rounds": _total_rounds(),
-        "pescara_position": pescara_position,
-        "team_count": team_count,
-        "pescara_points": pescara_points,
-        "games_played": games_played,
-        "max_potential_points": max_potential_points,
-        "last_game": last_game,
-        "next_game": next_game,
-        "latest_table": table,
-        "entry": entry,
-        "pescara_team": pescara_team,
+    snapshot = await sync_to_async(get_dashboard)()
+
+    return await _arender(request, "stats/home.html", {
+        "latest_jornada": snapshot.latest_jornada,
+        "total_rounds": snapshot.total_rounds,
+        "pescara_position": snapshot.position,
+        "team_count": snapshot.team_count,
+        "pescara_points": snapshot.points,
+        "games_played": snapshot.games_played,
+        "max_potential_points": snapshot.max_potential_points,
+        "last_game": snapshot.last_game,
+        "next_game": snapshot.next_game,
+        "pescara_team": snapshot.home_team,
+        "spark_url": trajectory_svg_url(snapshot.data_version),
     })
 
 
@@ -355,61 +455,42 @@ def home_view(request):
 # Positions trajectory (sparkline + table)
 # --------------------
 
-def pescara_positions_view(request):
-    """
-    Trajectory page for the ACTIVE team (from SiteSettings):
-    - Sparkline uses a fixed Y-scale (1..25) and X placed by real jornada (J1..J{TOTAL_ROUNDS}).
-    - Table shows opponent logo (with tooltip name) and the score instead of G/P/E letters,
-      while keeping the color via res_class (win|draw|loss).
-    """
-
-    # ---- resolve active/home team ----
-    site = (
-        SiteSettings.objects
-        .select_related("home_club")
-        .filter(is_active=True)
-        .first()
-    )
-    home_team = site.home_club if site and site.home_club else None
+TRAJECTORY_SVG_KEY = "stats:trajectory-svg:{version}"
 
-    # Fallback to the old behavior so nothing breaks if SiteSettings isn't set yet
-    if not home_team:
-        home_team = Team.objects.filter(name__icontains="pescara").first()
 
-    if not home_team:
-        return render(request, "stats/pos_trend.html", {"rows": [], "max_pos": 0})
-
-    # ---- league tables (ordered) ----
-    tables = (
-        LeagueTable.objects
-        .order_by("date", "jornada")
-        .prefetch_related("entries__team")
-    )
+def _trajectory_rows(home_team):
+    """
+    One row per LeagueTable with the home team's position/points, annotated
+    with that jornada's game (opponent, score, result class) and chip color.
+    """
+    # ---- home team (position, points) per resolved league table, ordered ----
+    tables = [
+        (jornada, state.get(home_team.id))
+        for _, _, jornada, state in resolved_rows(("position", "points"))
+    ]
 
     # ---- games indexed by jornada to annotate opponent + score + result ----
     games = (
         PescaraGame.objects
         .select_related("opponent")
         .only("jornada", "result", "goals_for", "goals_against",
-              "opponent__name", "opponent__logo")
+              "opponent__name", "opponent__logo", "opponent__logo_variants")
     )
     games_by_j = {g.jornada: g for g in games}
 
     rows = []
     max_pos_seen = 0
 
-    for t in tables:
-        # find HOME TEAM entry for this jornada
-        entry = next((x for x in t.entries.all() if x.team_id == home_team.id), None)
+    for jornada, entry in tables:
+        # skip the tables without the HOME TEAM
         if not entry:
             continue
 
-        pos = entry.position
-        pts = getattr(entry, "points", None) or 0
+        pos, pts = entry[0], entry[1] or 0
         max_pos_seen = max(max_pos_seen, pos)
 
         # annotate with game data if exists
-        g = games_by_j.get(t.jornada)
+        g = games_by_j.get(jornada)
         res_cls, score_str, opp_name, opp_logo = "", "", "", None
 
         if g:
@@ -425,15 +506,13 @@ def pescara_positions_view(request):
 
             if g.opponent:
                 opp_name = g.opponent.name or ""
-                logo = getattr(g.opponent, "logo", None)
-                if logo:
-                    try:
-                        opp_logo = logo.url
-                    except Exception:
-                        opp_logo = None
+                try:
+                    opp_logo = g.opponent.logo_thumbs.url("sm") or None
+                except Exception:
+                    opp_logo = None
 
         rows.append({
-            "jornada": t.jornada,
+            "jornada": jornada,
             "position": pos,
             "points": pts,
             # table UI bits
@@ -448,7 +527,13 @@ def pescara_positions_view(request):
     for r in rows:
         r["color"] = _gradient_color(r["position"], max_pos)
 
-    # ---- sparkline (fixed Y: 1..25; X by real J) ----
+    return rows
+
+
+def _sparkline(rows, total_rounds):
+    """
+    Geometry for the trajectory sparkline (fixed Y: 1..25; X by real J).
+    """
     svg_w, svg_h = 920, 260
     pad_l, pad_r, pad_t, pad_b = 36, 18, 12, 24
     inner_w = svg_w - pad_l - pad_r
@@ -462,8 +547,8 @@ def pescara_positions_view(request):
         return pad_t + t * inner_h
 
     def x_for_j(j: int) -> float:
-        j = max(1, min(j, _total_rounds()))
-        span = max(1, _total_rounds() - 1)
+        j = max(1, min(j, total_rounds))
+        span = max(1, total_rounds - 1)
         t = (j - 1) / span
         return pad_l + t * inner_w
 
@@ -482,26 +567,258 @@ def pescara_positions_view(request):
     spark_points = " ".join(points)
 
     # X-axis labels J1..TOTAL_ROUNDS
-    x_axis_step = inner_w / max(1, (_total_rounds() - 1))
-    x_labels = [{"x": int(round(pad_l + i * x_axis_step)), "text": f"J{i+1}"} for i in range(_total_rounds())]
+    x_axis_step = inner_w / max(1, (total_rounds - 1))
+    x_labels = [{"x": int(round(pad_l + i * x_axis_step)), "text": f"J{i+1}"} for i in range(total_rounds)]
 
     # Y ticks every 5
     y_ticks = [1, 5, 10, 15, 20, 25]
     y_labels = [{"y": int(round(y_for(val))), "text": str(val)} for val in y_ticks]
 
-    jornada_span = f"J{rows[0]['jornada']}–J{rows[-1]['jornada']}" if rows else ""
-
-    return render(request, "stats/pos_trend.html", {
-        "rows": rows,
+    return {
         "max_pos": y_max,
         "spark_w": svg_w,
         "spark_h": svg_h,
         "spark_points": spark_points,
         "spark_dots": dots,
         "y_labels": y_labels,
+        "x_labels": x_labels,
+    }
+
+
+def _trajectory_svg(request):
+    """
+    Standalone trajectory SVG for the home team, rendered once per data
+    version and kept in the cache. Returns (version, svg) – svg is "" when
+    there is no home team.
+    """
+    version, _ = get_data_version()
+    key = TRAJECTORY_SVG_KEY.format(version=version)
+    svg = cache.get(key)
+    if svg is None:
+        home_team = _home_team_fallback(request)
+        rows = _trajectory_rows(home_team) if home_team else []
+        svg = render_to_string("stats/pos_trend.svg", _sparkline(rows, _total_rounds(request)))
+        cache.set(key, svg, DERIVED_CACHE_TIMEOUT)
+    return version, svg
+
+
+def trajectory_svg_url(version):
+    return reverse("pescara_positions_svg", args=[version])
+
+
+def pescara_positions_svg(request, version):
+    """
+    The trajectory sparkline as an image. The URL carries the data version,
+    so the current one is served as immutable; stale versions redirect.
+    """
+    current, svg = _trajectory_svg(request)
+    if version != current:
+        return redirect(trajectory_svg_url(current))
+    response = HttpResponse(svg, content_type="image/svg+xml")
+    patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    return response
+
+
+@data_conditional
+@cache_public_page()
+async def pescara_positions_view(request):
+    """
+    Trajectory page for the ACTIVE team (from SiteSettings):
+    - Sparkline uses a fixed Y-scale (1..25) and X placed by real jornada (J1..J{TOTAL_ROUNDS}),
+      embedded as the cached SVG from pescara_positions_svg.
+    - Table shows opponent logo (with tooltip name) and the score instead of G/P/E letters,
+      while keeping the color via res_class (win|draw|loss).
+    """
+
+    # ---- resolve active/home team (falls back to the old "pescara" lookup) ----
+    site_info = await sync_to_async(get_site_info)(request)
+    home_team, total_rounds = site_info.home_team, site_info.total_rounds
+
+    if not home_team:
+        return await _arender(request, "stats/pos_trend.html", {"rows": [], "max_pos": 0})
+
+    rows, (version, _) = await asyncio.gather(
+        sync_to_async(_trajectory_rows)(home_team),
+        sync_to_async(get_data_version)(),
+    )
+    jornada_span = f"J{rows[0]['jornada']}–J{rows[-1]['jornada']}" if rows else ""
+
+    return await _arender(request, "stats/pos_trend.html", {
+        "rows": rows,
+        "max_pos": 25,
+        "spark_url": trajectory_svg_url(version),
         "first_round": rows[0]["jornada"] if rows else None,
         "last_round": rows[-1]["jornada"] if rows else None,
-        "x_labels": x_labels,
-        "total_rounds": _total_rounds(),
+        "total_rounds": total_rounds,
         "jornada_span": jornada_span,
-    })
\ No newline at end of file
+    })
+
+
+# --------------------
+# All-teams trajectory (team × jornada matrix)
+# --------------------
+
+POSITION_MATRIX_KEY = "stats:position-matrix:{version}"
+LINE_PALETTE = (
+    "#46a0ff", "#f97316", "#22c55e", "#e11d48", "#a855f7", "#eab308",
+    "#14b8a6", "#f43f5e", "#6366f1", "#84cc16", "#06b6d4", "#d946ef",
+)
+
+
+def _position_matrix():
+    """
+    Pivot every LeagueTableEntry of the season into a team × jornada matrix:
+    {"jornadas": [1, 2, ...], "teams": [{"id", "name", "positions", "points"}, ...]}
+    with None where a team is missing from a table. Two narrow queries
+    (tables resolved by stats/snapshots.py) plus the team names, linear in
+    the number of entries; cached per data version.
+    """
+    version, _ = get_data_version()
+    key = POSITION_MATRIX_KEY.format(version=version)
+    matrix = cache.get(key)
+    if matrix is not None:
+        return matrix
+
+    entries = [
+        (j, team_id, pos, pts)
+        for _, _, j, state in resolved_rows(("position", "points"))
+        for team_id, (pos, pts) in state.items()
+    ]
+
+    # column per jornada, in table order (a later table for the same J wins)
+    col_of = {}
+    for j, _, _, _ in entries:
+        col_of.setdefault(j, len(col_of))
+    width = len(col_of)
+
+    by_team = {}
+    for j, team_id, pos, pts in entries:
+        row = by_team.get(team_id)
+        if row is None:
+            row = by_team[team_id] = ([None] * width, [None] * width)
+        col = col_of[j]
+        row[0][col] = pos
+        row[1][col] = pts
+
+    names = dict(Team.objects.filter(pk__in=by_team).order_by().values_list("pk", "name"))
+    last = width - 1
+    teams = [
+        {"id": team_id, "name": names.get(team_id, ""), "positions": positions, "points": points}
+        for team_id, (positions, points) in by_team.items()
+    ]
+    # latest standings order first; teams missing from the last table go last
+    teams.sort(key=lambda t: (t["positions"][last] is None, t["positions"][last] or 0, t["name"]))
+
+    matrix = {"jornadas": list(col_of), "teams": teams}
+    cache.set(key, matrix, DERIVED_CACHE_TIMEOUT)
+    return matrix
+
+
+def _matrix_chart(matrix, total_rounds, highlight_id=None):
+    """
+    Geometry for the multi-line chart: one polyline per team, Y by position
+    (1..number of teams), X by real jornada (J1..J{total_rounds}).
+    """
+    svg_w, svg_h = 920, 360
+    pad_l, pad_r, pad_t, pad_b = 36, 18, 12, 24
+    inner_w = svg_w - pad_l - pad_r
+    inner_h = svg_h - pad_t - pad_b
+
+    y_max = max(len(matrix["teams"]), 2)
+    span_x = max(1, total_rounds - 1)
+    xs = [int(round(pad_l + (max(1, min(j, total_rounds)) - 1) / span_x * inner_w))
+          for j in matrix["jornadas"]]
+
+    def y_for(pos):
+        return int(round(pad_t + (min(pos, y_max) - 1) / (y_max - 1) * inner_h))
+
+    lines = []
+    for i, team in enumerate(matrix["teams"]):
+        points = " ".join(
+            f"{x},{y_for(pos)}" for x, pos in zip(xs, team["positions"]) if pos is not None
+        )
+        lines.append({
+            "id": team["id"],
+            "name": team["name"],
+            "points": points,
+            "color": LINE_PALETTE[i % len(LINE_PALETTE)],
+            "highlight": team["id"] == highlight_id,
+        })
+    # draw the highlighted line last so it sits on top
+    lines.sort(key=lambda line: line["highlight"])
+
+    x_axis_step = inner_w / span_x
+    y_ticks = sorted({1, y_max, *range(5, y_max, 5)})
+    return {
+        "chart_w": svg_w,
+        "chart_h": svg_h,
+        "lines": lines,
+        "x_labels": [{"x": int(round(pad_l + i * x_axis_step)), "text": f"J{i+1}"} for i in range(total_rounds)],
+        "y_labels": [{"y": y_for(val), "text": str(val)} for val in y_ticks],
+    }
+
+
+@data_conditional
+@cache_public_page("team")
+def all_positions_view(request):
+    """
+    Trajectory of every team in the league, with a selector that highlights
+    one of them (the home club by default).
+    """
+    matrix = _position_matrix()
+    home_team = _home_team_fallback(request)
+
+    highlight_id = home_team.pk if home_team else None
+    team_param = request.GET.get("team", "")
+    if team_param.isdigit():
+        highlight_id = int(team_param)
+
+    selected = next((t for t in matrix["teams"] if t["id"] == highlight_id), None)
+    return render(request, "stats/pos_trend_all.html", {
+        "jornadas": matrix["jornadas"],
+        "teams": matrix["teams"],
+        "selected": selected,
+        "selected_rows": list(zip(matrix["jornadas"], selected["positions"], selected["points"])) if selected else [],
+        **_matrix_chart(matrix, _total_rounds(request), highlight_id),
+    })
+
+
+# --------------------
+# Exports
+# --------------------
+
+@data_conditional
+def export_view(request, dataset, fmt):
+    """
+    Stream games (partidos), appearances (apariciones) or resolved league
+    tables (tablas) as CSV or NDJSON, filtered by ?from=/?to=/?jornada=.
+    Rows are read and written in chunks (stats/exports.py), so the response
+    is never held in memory, under WSGI or ASGI.
+    """
+    if dataset not in DATASETS or fmt not in EXPORT_FORMATS:
+        raise Http404("Exportación desconocida")
+    chunks = public_chunks(export_chunks(dataset, fmt, parse_filters(request.GET)))
+    if isinstance(request, ASGIRequest):
+        # Django buffers sync iterators under ASGI; hand it an async one
+        chunks = aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+
+# --------------------
+# Instrumentation
+# --------------------
+
+def metrics_view(request):
+    """
+    Per-view request metrics in the Prometheus text format. Open to staff
+    users, or to scrapers sending `Authorization: Bearer <STATS_METRICS_TOKEN>`.
+    """
+    token = getattr(settings, "STATS_METRICS_TOKEN", "")
+    authorized = request.user.is_staff or (
+        token and request.headers.get("Authorization", "") == f"Bearer {token}"
+    )
+    if not authorized:
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(metrics.prometheus_text(), content_type="text/plain; version=0.0.4; charset=utf-8")